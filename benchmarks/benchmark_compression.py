@@ -0,0 +1,73 @@
+"""
+Benchmark of the compression of the season files: size of the file compared to the uncompressed games and read throughput of every game.
+
+The games are read from a season file (.games) or from a season json file written before the season files, run from the root of the repository:
+
+    python -m benchmarks.benchmark_compression ../notebooks/hockey/Season20172018/season20172018.games
+
+Without a season file, the games of the fake season of benchmark_downloader are used (they compress much better than real games).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.benchmark_downloader import build_fake_season
+from src.SeasonFile import SeasonFileReader, SeasonFileWriter, is_season_file, train_compression_dictionary, zstandard
+
+
+def load_json_games(path_to_file: str) -> dict:
+    """
+    Returns: A dictionary where the key is the game id and the value the json (bytes) of the game
+    """
+    if path_to_file is None:
+        return {game_id: json_game.encode('utf-8') for game_id, json_game in build_fake_season(300).items()}
+    if is_season_file(path_to_file):
+        with SeasonFileReader(path_to_file) as season_file:
+            return {game_id: season_file.get_game_bytes(game_id) for game_id in season_file.game_ids()}
+    with open(path_to_file, 'r', encoding='utf-8') as file:
+        return {int(game_id): json.dumps(game).encode('utf-8') for game_id, game in json.loads(file.read()).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('season_file', nargs='?', default=None, help='Season file (.games) or season json file')
+    parser.add_argument('--dictionary-samples', type=int, default=200, help='Number of games used to train the zstd dictionary')
+    args = parser.parse_args()
+
+    json_games = load_json_games(args.season_file)
+    raw_size = sum(len(json_game) for json_game in json_games.values())
+    print(f'{len(json_games)} games, {raw_size / 1e6:.1f} MB of json')
+
+    configurations = [('none', None, None), ('gzip', 1, None), ('gzip', 6, None), ('gzip', 9, None)]
+    if zstandard is not None:
+        dictionary = train_compression_dictionary(list(json_games.values())[:args.dictionary_samples])
+        configurations += [('zstd', 3, None), ('zstd', 10, None), ('zstd', 19, None), ('zstd', 10, dictionary)]
+    else:
+        print('zstandard is not installed, zstd is skipped')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for compression, compression_level, compression_dictionary in configurations:
+            path_to_file = directory + '/season.games'
+            start = time.perf_counter()
+            with SeasonFileWriter(path_to_file, resume=False, compression=compression, compression_level=compression_level,
+                                  compression_dictionary=compression_dictionary) as season_file:
+                for game_id, json_game in json_games.items():
+                    season_file.add_game(game_id, json_game)
+            write_time = time.perf_counter() - start
+            size = os.path.getsize(path_to_file)
+
+            start = time.perf_counter()
+            with SeasonFileReader(path_to_file) as season_file:
+                for game_id in season_file.game_ids():
+                    season_file.get_game_bytes(game_id)
+            read_time = time.perf_counter() - start
+
+            name = f'{compression}' + (f' {compression_level}' if compression_level is not None else '') + (' + dictionary' if compression_dictionary else '')
+            print(f'{name:20s} {size / 1e6:8.1f} MB  ratio {raw_size / size:5.1f}  write {write_time:6.2f} s  '
+                  f'read {raw_size / 1e6 / read_time:7.0f} MB/s ({len(json_games) / read_time:7.0f} games/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of DataExtractor.get_season_into_dataframe against the dataframe built by appending the dataframe of every game to the season,
+as it was done before (DataFrame.append was removed in pandas 2, pd.concat is used instead, which copies the season the same way).
+
+The fake seasons of benchmarks/fake_feed.py are written in season files, the plays of one season and of five seasons are put in one
+dataframe (the five seasons are built one after the other and concatenated once). The cache of the dataframes is disabled. Run from the
+root of the repository:
+
+    python -m benchmarks.benchmark_dataframe --games 1271 --seasons 1 5
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fake_feed import write_fake_season_file
+from src.DataExtractor import DataExtractor, share_categories
+
+FIRST_YEAR = 2016
+
+
+def build_dataframe_by_appending(extractor: DataExtractor, paths_to_files: list) -> pd.DataFrame:
+    df_season = pd.DataFrame()
+    for path_to_file in paths_to_files:
+        all_games_in_season = extractor.get_game_data(path_to_file)
+        for game in all_games_in_season:
+            game_pk, clean_game = extractor.clean_single_game_json(all_games_in_season.get(game))
+            df_game = extractor.create_panda_dataframe_for_one_game(game_pk, clean_game)
+            df_season = pd.concat([df_season, df_game])
+            df_season.reset_index(drop=True, inplace=True)
+    df_season['about.eventIdx'] = df_season['about.eventIdx'].astype(str).astype(int)
+    df_season['coordinates.x'] = df_season['coordinates.x'].astype(str).astype(float)
+    df_season['coordinates.y'] = df_season['coordinates.y'].astype(str).astype(float)
+    return df_season
+
+
+def build_dataframe(extractor: DataExtractor, paths_to_files: list) -> pd.DataFrame:
+    return pd.concat(share_categories(extractor.get_season_into_dataframe(path_to_file, use_cache=False) for path_to_file in paths_to_files),
+                     ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1271, help='Number of regular season games of every fake season')
+    parser.add_argument('--seasons', type=int, nargs='+', default=[1, 5], help='Number of seasons put in one dataframe')
+    parser.add_argument('--skip-append', action='store_true', help='Only time get_season_into_dataframe')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths_to_files = []
+        for year in range(FIRST_YEAR, FIRST_YEAR + max(args.seasons)):
+            paths_to_files.append(f'{directory}/season{year}{year+1}.games')
+            write_fake_season_file(paths_to_files[-1], year, args.games)
+
+        extractor = DataExtractor(directory)
+        for nb_of_seasons in args.seasons:
+            start = time.perf_counter()
+            df = build_dataframe(extractor, paths_to_files[:nb_of_seasons])
+            elapsed = time.perf_counter() - start
+            line = f'{nb_of_seasons} season(s)  {len(df):8d} plays  one dataframe {elapsed:7.2f} s'
+
+            if not args.skip_append:
+                start = time.perf_counter()
+                df_appended = build_dataframe_by_appending(extractor, paths_to_files[:nb_of_seasons])
+                elapsed_appending = time.perf_counter() - start
+                assert len(df_appended) == len(df) and df_appended['coordinates.x'].equals(df['coordinates.x'].astype('float64'))
+                line += f'  appending {elapsed_appending:7.2f} s  x{elapsed_appending / elapsed:.1f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark of StatsApiProxy.fetch_live_data_for_years against a local stub of the stats api.
+
+The stub serves a fake season (regular season games, a full playoff bracket and the schedule of the season) with an artificial
+latency per request, which is what dominates the download time against the real api. Every worker count is run once with the
+game ids probed until the end of the season and once with the game ids planned from the schedule. Run from the root of the repository:
+
+    python -m benchmarks.benchmark_downloader --games 300 --latency 0.05 --workers 1 4 8 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.StatsApiProxy import StatsApiProxy
+
+YEAR = 2017
+
+
+def build_fake_season(nb_of_regular_games: int) -> dict:
+    """
+    Build the game ids of a fake season and the json returned for each of them.
+
+    Returns: A dictionary where the key is the game id and the value the json string served by the stub
+    """
+    game_ids = [int(f'{YEAR}02{game:04d}') for game in range(1, nb_of_regular_games + 1)]
+    #Every series of the bracket goes to a different number of games to exercise the probing of the playoffs
+    for playoff_round, nb_of_matchup in enumerate([8, 4, 2, 1], start=1):
+        for matchup in range(1, nb_of_matchup + 1):
+            for game in range(1, 4 + (matchup % 4) + 1):
+                game_ids.append(int(f'{YEAR}030{playoff_round}{matchup}{game}'))
+
+    season = {}
+    for game_id in game_ids:
+        plays = [{'result': {'eventTypeId': 'SHOT'}, 'about': {'eventIdx': i, 'period': 1 + i // 40},
+                  'coordinates': {'x': i % 90, 'y': i % 40}} for i in range(120)]
+        season[game_id] = json.dumps({'gamePk': game_id, 'gameData': {'status': {'abstractGameState': 'Final'}},
+                                      'liveData': {'plays': {'allPlays': plays}}}, indent=2)
+    return season
+
+
+def start_stub_server(season: dict, latency: float, requests_received: list) -> ThreadingHTTPServer:
+    schedule = json.dumps({'dates': [{'games': [{'gamePk': game_id} for game_id in season]}]}).encode('utf-8')
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def send_json(self, body: bytes):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            requests_received.append(self.path)
+            time.sleep(latency)
+            if self.path.startswith('/api/v1/schedule'):
+                self.send_json(schedule)
+                return
+            parts = self.path.strip('/').split('/')
+            game_id = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else None
+            if game_id not in season:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_json(season[game_id].encode('utf-8'))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=300, help='Number of regular season games of the fake season')
+    parser.add_argument('--latency', type=float, default=0.05, help='Latency in seconds of every request to the stub')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    season = build_fake_season(args.games)
+    requests_received = []
+    server = start_stub_server(season, args.latency, requests_received)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/api/v1'
+    print(f'{len(season)} games served with a latency of {args.latency * 1000:.0f} ms per request')
+
+    baseline = None
+    for use_schedule in [False, True]:
+        for max_workers in args.workers:
+            proxy = StatsApiProxy(max_workers=max_workers, base_url=base_url, use_schedule=use_schedule)
+            requests_received.clear()
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    proxy.fetch_live_data_for_years([YEAR], directory + '/hockey', False)
+                elapsed = time.perf_counter() - start
+            games_per_second = len(season) / elapsed
+            baseline = baseline or games_per_second
+            print(f'{"schedule" if use_schedule else "probing ":8s}  max_workers={max_workers:3d}  {len(requests_received):5d} requests  '
+                  f'{elapsed:7.2f} s  {games_per_second:8.1f} games/s  x{games_per_second / baseline:.1f}')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
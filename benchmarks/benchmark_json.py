@@ -0,0 +1,68 @@
+"""
+Benchmark of the json backends (src/JsonBackend.py) on the games of a season: time to parse every game from bytes, and memory of the parsed
+game (retained) and peak memory during the parsing, measured with tracemalloc on some of the games. The decoder of the dataframes (schema,
+see src/FeedDecoder.py) that only keeps the values used by DataExtractor for the shots and the goals is measured too. Run from the root of
+the repository:
+
+    python -m benchmarks.benchmark_json ../notebooks/hockey/Season20172018/season20172018.games
+
+Without a season file, the games of a fake season (benchmarks/fake_feed.py) are used.
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.fake_feed import build_fake_season_games
+from src.DataExtractor import PLAY_COLUMNS, SHOT_EVENT_TYPES
+from src.FeedDecoder import FeedDecoder
+from src.JsonBackend import JsonBackend, get_available_backends
+from src.SeasonFile import SeasonFileReader
+
+
+def load_json_games(path_to_file: str, nb_of_games: int) -> list:
+    if path_to_file is None:
+        return [json_game.encode('utf-8') for json_game in build_fake_season_games(2017, nb_of_games).values()]
+    with SeasonFileReader(path_to_file) as season_file:
+        return [season_file.get_game_bytes(game_id) for game_id in season_file.game_ids()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('season_file', nargs='?', default=None, help='Season file (.games)')
+    parser.add_argument('--games', type=int, default=300, help='Number of regular season games of the fake season')
+    parser.add_argument('--memory-sample', type=int, default=50, help='Number of games parsed with tracemalloc')
+    parser.add_argument('--backends', nargs='+', default=get_available_backends(), help='Backends to measure (and schema)')
+    args = parser.parse_args()
+
+    decoders = {name: JsonBackend(name).loads for name in args.backends if name != 'schema'}
+    schema_decoder = FeedDecoder([path for name, path, default, dtype in PLAY_COLUMNS])
+    if schema_decoder.is_typed:
+        decoders['schema'] = lambda json_game: schema_decoder.decode_game(json_game, SHOT_EVENT_TYPES)
+
+    json_games = load_json_games(args.season_file, args.games)
+    size = sum(len(json_game) for json_game in json_games)
+    print(f'{len(json_games)} games, {size / 1e6:.1f} MB of json, backends installed: {", ".join(get_available_backends())}')
+
+    for name, loads in decoders.items():
+        start = time.perf_counter()
+        for json_game in json_games:
+            loads(json_game)
+        elapsed = time.perf_counter() - start
+
+        retained, peak = 0, 0
+        sample = json_games[:args.memory_sample]
+        for json_game in sample:
+            tracemalloc.start()
+            game = loads(json_game)
+            current, game_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del game
+            retained += current
+            peak = max(peak, game_peak)
+
+        print(f'{name:8s} {elapsed:7.2f} s  {size / 1e6 / elapsed:7.1f} MB/s  {len(json_games) / elapsed:7.1f} games/s  '
+              f'{retained / len(sample) / 1e6:6.2f} MB per parsed game  peak {peak / 1e6:6.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
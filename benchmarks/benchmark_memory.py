@@ -0,0 +1,70 @@
+"""
+Memory report of the dataframe of the plays of a season: memory of every column (pandas memory_usage with deep=True) with the types of
+PLAY_COLUMNS and GAME_COLUMNS (categories, small ints, float32, periodTime in seconds) and with the types of the previous versions of the
+dataframe (strings, int64, float64, periodTime "MM:SS"), and time of the groupbys of question 5 with both. Run from the root of the
+repository:
+
+    python -m benchmarks.benchmark_memory ../notebooks/hockey/Season20172018/season20172018.games
+
+Without a season file, a fake season (benchmarks/fake_feed.py) is used.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fake_feed import write_fake_season_file
+from src.DataExtractor import DataExtractor, GAME_COLUMNS, PLAY_COLUMNS
+
+# types of the columns before the compact types, None lets pandas choose
+PREVIOUS_TYPES = {'about.eventIdx': 'int64', 'about.period': 'int64', 'coordinates.x': 'float64', 'coordinates.y': 'float64'}
+PREVIOUS_GAME_TYPES = {'ID': 'int64', 'gamePk': 'int64'}
+
+
+def build_previous_dataframe(path_to_file: str) -> pd.DataFrame:
+    extractor = DataExtractor()
+    for name, path, default, dtype in PLAY_COLUMNS:
+        extractor.register_column(name, path, default, PREVIOUS_TYPES.get(name))
+    df = extractor.get_season_into_dataframe(path_to_file, use_cache=False)
+    for name, dtype in GAME_COLUMNS:
+        df[name] = df[name].astype(PREVIOUS_GAME_TYPES[name]) if name in PREVIOUS_GAME_TYPES else df[name].astype(object).infer_objects()
+    return df
+
+
+def time_groupbys(df: pd.DataFrame, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df.groupby(['result.secondaryType', 'result.eventTypeId']).size()
+        df.groupby(['team.name', 'result.eventTypeId'])['coordinates.x'].count()
+        df.groupby('players.0.player.fullName').size()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('season_file', nargs='?', default=None, help='Season file (.games)')
+    parser.add_argument('--games', type=int, default=1271, help='Number of regular season games of the fake season')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path_to_file = args.season_file
+        if path_to_file is None:
+            path_to_file = os.path.join(directory, 'season20172018.games')
+            write_fake_season_file(path_to_file, 2017, args.games)
+
+        df = DataExtractor().get_season_into_dataframe(path_to_file, use_cache=False)
+        df_previous = build_previous_dataframe(path_to_file)
+
+    memory = pd.DataFrame({'previous type': df_previous.dtypes.astype(str), 'previous MB': df_previous.memory_usage(index=False, deep=True) / 1e6,
+                           'type': df.dtypes.astype(str), 'MB': df.memory_usage(index=False, deep=True) / 1e6})
+    memory['type'] = memory['type'].where(~memory['type'].str.startswith('category'), 'category')
+    print(f'{len(df)} plays')
+    print(memory.round(3).to_string())
+    print(f'total: {memory["previous MB"].sum():.1f} MB -> {memory["MB"].sum():.1f} MB ({memory["previous MB"].sum() / memory["MB"].sum():.1f}x)')
+    print(f'groupbys: {time_groupbys(df_previous) * 1000:.1f} ms -> {time_groupbys(df) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
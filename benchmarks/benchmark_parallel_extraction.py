@@ -0,0 +1,49 @@
+"""
+Benchmark of DataExtractor.get_seasons_into_dataframe: time to put the plays of several fake seasons (benchmarks/fake_feed.py) in one
+dataframe for every number of worker processes. The cache of the dataframes is disabled and every dataframe is compared to the one
+built without processes. Run from the root of the repository:
+
+    python -m benchmarks.benchmark_parallel_extraction --games 1271 --seasons 5 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fake_feed import write_fake_season_file
+from src.DataExtractor import DataExtractor
+
+FIRST_YEAR = 2017
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1271, help='Number of regular season games of every fake season')
+    parser.add_argument('--seasons', type=int, default=5, help='Number of fake seasons')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=100, help='Number of games extracted by a process at once')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths_to_files = []
+        for year in range(FIRST_YEAR, FIRST_YEAR + args.seasons):
+            paths_to_files.append(f'{directory}/season{year}{year+1}.games')
+            write_fake_season_file(paths_to_files[-1], year, args.games)
+        print(f'{args.seasons} season(s) of {args.games} regular season games, {os.cpu_count()} cpu(s)')
+
+        extractor = DataExtractor(directory)
+        baseline = None
+        for max_workers in args.workers:
+            start = time.perf_counter()
+            df = extractor.get_seasons_into_dataframe(paths_to_files, max_workers=max_workers, chunk_size=args.chunk_size, use_cache=False)
+            elapsed = time.perf_counter() - start
+            if baseline is None:
+                baseline, df_baseline = elapsed, df
+            pd.testing.assert_frame_equal(df, df_baseline)
+            print(f'max_workers={max_workers:3d}  {len(df):8d} plays  {elapsed:7.2f} s  {len(df) / elapsed:9.0f} plays/s  x{baseline / elapsed:.1f}')
+
+
+if __name__ == '__main__':
+    main()
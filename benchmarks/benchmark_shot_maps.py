@@ -0,0 +1,69 @@
+"""
+Benchmark of the excess shot rate maps of every team of a fake season (benchmarks/fake_feed.py): one np.histogram2d per team and for the
+league, as in the question_6 notebooks, against ift6758.visualizations.shot_maps which bins every shot of the league at once. Run from the
+root of the repository:
+
+    python -m benchmarks.benchmark_shot_maps --games 1271
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_feed import write_fake_season_file
+from ift6758.visualizations.shot_maps import compute_shot_maps
+from src.DataExtractor import DataExtractor
+
+YEAR = 2017
+
+
+def compute_shot_maps_by_team(extractor: DataExtractor, df, team_ids: list, bin_size: float) -> dict:
+    x_edges = np.arange(0, 100 + bin_size / 2, bin_size)
+    y_edges = np.arange(-42.5, 42.5 + bin_size / 2, bin_size)
+    league_hours = sum(np.sum(extractor.get_time_played_from_team_season_dataframe(df, team_id)) for team_id in team_ids) / 60
+    league_x = np.concatenate([np.abs(extractor.get_team_shots_from_dataframe(df, team_id)[0]) for team_id in team_ids])
+    league_y = np.concatenate([extractor.get_team_shots_from_dataframe(df, team_id)[1] for team_id in team_ids])
+    league_rate = np.histogram2d(league_x, league_y, bins=(x_edges, y_edges))[0] / league_hours
+
+    excess = {}
+    for team_id in team_ids:
+        x, y = extractor.get_team_shots_from_dataframe(df, team_id)
+        team_hours = np.sum(extractor.get_time_played_from_team_season_dataframe(df, team_id)) / 60
+        excess[team_id] = np.histogram2d(np.abs(x), y, bins=(x_edges, y_edges))[0] / team_hours - league_rate
+    return excess
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1271, help='Number of regular season games of the fake season')
+    parser.add_argument('--bin-size', type=float, default=5.0, help='Size of the bins in feet')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path_to_file = f'{directory}/season{YEAR}{YEAR+1}.games'
+        write_fake_season_file(path_to_file, YEAR, args.games)
+        extractor = DataExtractor(directory)
+        df = extractor.get_season_into_dataframe(path_to_file)
+        team_ids = sorted(df['team.id'].dropna().unique())
+        print(f'{len(df)} shots, {len(team_ids)} teams')
+
+        start = time.perf_counter()
+        excess_by_team = compute_shot_maps_by_team(extractor, df, team_ids, args.bin_size)
+        elapsed_by_team = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shot_maps = compute_shot_maps(df, extractor.get_time_played_by_team(df), args.bin_size)
+        elapsed = time.perf_counter() - start
+        for position, team_id in enumerate(shot_maps['team_ids']):
+            assert np.allclose(shot_maps['excess'][position], excess_by_team[team_id])
+
+        start = time.perf_counter()
+        compute_shot_maps(df, extractor.get_time_played_by_team(df), args.bin_size, sigma=1.5)
+        elapsed_smoothed = time.perf_counter() - start
+        print(f'one histogram per team {elapsed_by_team:7.3f} s  one tensor {elapsed:7.3f} s  x{elapsed_by_team / elapsed:.0f}  '
+              f'with smoothing {elapsed_smoothed:7.3f} s')
+
+
+if __name__ == '__main__':
+    main()
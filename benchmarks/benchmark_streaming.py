@@ -0,0 +1,64 @@
+"""
+Benchmark of the aggregation of several fake seasons (benchmarks/fake_feed.py): number of shots and goals by type of shot, computed on the
+dataframe of all the seasons (DataExtractor.get_seasons_into_dataframe) and chunk by chunk (DataExtractor.iter_season_dataframes). The time
+and the peak memory (tracemalloc) of both are compared. Run from the root of the repository:
+
+    python -m benchmarks.benchmark_streaming --games 1271 --seasons 5 --chunk-size 100
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.fake_feed import write_fake_season_file
+from src.DataExtractor import DataExtractor
+
+FIRST_YEAR = 2017
+
+
+def count_shot_types(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby(['result.secondaryType', 'result.eventTypeId']).size().unstack(fill_value=0)
+
+
+def measure(function) -> (pd.DataFrame, float, float):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=300, help='Number of regular season games of every fake season')
+    parser.add_argument('--seasons', type=int, default=3, help='Number of fake seasons')
+    parser.add_argument('--chunk-size', type=int, default=100, help='Number of games of every chunk')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths_to_files = []
+        for year in range(FIRST_YEAR, FIRST_YEAR + args.seasons):
+            paths_to_files.append(f'{directory}/season{year}{year+1}.games')
+            write_fake_season_file(paths_to_files[-1], year, args.games)
+        print(f'{args.seasons} season(s) of {args.games} regular season games')
+
+        extractor = DataExtractor(directory)
+        columns = ['result.secondaryType', 'result.eventTypeId']
+        counts, elapsed, peak = measure(lambda: count_shot_types(
+            extractor.get_seasons_into_dataframe(paths_to_files, max_workers=1, columns=columns, use_cache=False)))
+        print(f'whole dataframe  {elapsed:6.2f} s  peak {peak / 1e6:7.1f} MB')
+
+        chunk_counts, elapsed, peak = measure(lambda: pd.concat(
+            [count_shot_types(df) for df in extractor.iter_season_dataframes(paths_to_files, args.chunk_size, columns=columns)]
+        ).groupby(level=0).sum().fillna(0).astype('int64'))
+        print(f'chunks of {args.chunk_size:4d}   {elapsed:6.2f} s  peak {peak / 1e6:7.1f} MB')
+
+        pd.testing.assert_frame_equal(chunk_counts.sort_index().sort_index(axis=1), counts.sort_index().sort_index(axis=1), check_names=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Fake live feeds with the structure of https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live/ used by the benchmarks: teams, players,
+plays of every type with coordinates, linescore with the periods and the rink side of the teams, scoring plays and plays by period.
+"""
+import json
+import random
+
+TEAMS = [(team_id, f'Team {team_id}', f'T{team_id:02d}') for team_id in range(1, 32)]
+EVENT_TYPES = ['FACEOFF', 'HIT', 'SHOT', 'MISSED_SHOT', 'BLOCKED_SHOT', 'GIVEAWAY', 'TAKEAWAY', 'STOP', 'PENALTY', 'GOAL']
+EVENT_WEIGHTS = [14, 16, 20, 10, 10, 6, 5, 12, 3, 2]
+SHOT_TYPES = ['Wrist Shot', 'Slap Shot', 'Snap Shot', 'Backhand', 'Tip-In', 'Deflected', 'Wrap-around']
+STRENGTHS = [('EVEN', 'Even'), ('PPG', 'Power Play'), ('SHG', 'Short Handed')]
+
+
+def build_fake_game(game_id: int, rng: random.Random, nb_of_plays: int = 320) -> dict:
+    home, away = rng.sample(TEAMS, 2)
+    #A game goes to overtime one time out of four, a regular season overtime can end in a shootout
+    nb_of_periods = 3 if rng.random() < 0.75 else 4
+    is_playoff = str(game_id)[4:6] == '03'
+    has_shootout = nb_of_periods == 4 and not is_playoff and rng.random() < 0.4
+    first_home_side = rng.choice(['left', 'right'])
+
+    players = {}
+    for team in (home, away):
+        for number in range(20):
+            player_id = 8470000 + team[0] * 100 + number
+            players[f'ID{player_id}'] = {'id': player_id, 'fullName': f'Player {player_id}', 'primaryNumber': str(number),
+                                         'currentTeam': {'id': team[0], 'name': team[1]}, 'primaryPosition': {'code': 'C', 'name': 'Center'}}
+
+    plays = []
+    for event_idx in range(nb_of_plays):
+        period = min(nb_of_periods, 1 + event_idx * nb_of_periods // nb_of_plays)
+        period_length = 5 if period > 3 and not is_playoff else 20
+        seconds = rng.randrange(period_length * 60)
+        team = rng.choice([home, away])
+        event_type = rng.choices(EVENT_TYPES, EVENT_WEIGHTS)[0]
+        team_players = [player for player in players.values() if player['currentTeam']['id'] == team[0]]
+        play = {
+            'result': {'event': event_type.replace('_', ' ').title(), 'eventCode': f'X{event_idx}', 'eventTypeId': event_type,
+                       'description': f'{event_type} by Player {event_idx}'},
+            'about': {'eventIdx': event_idx, 'eventId': event_idx + 1, 'period': period, 'periodType': 'REGULAR' if period <= 3 else 'OVERTIME',
+                      'ordinalNum': f'{period}', 'periodTime': f'{seconds // 60:02d}:{seconds % 60:02d}',
+                      'periodTimeRemaining': f'{(period_length * 60 - seconds) // 60:02d}:{(period_length * 60 - seconds) % 60:02d}',
+                      'dateTime': '2017-10-04T23:00:00Z', 'goals': {'away': 0, 'home': 0}},
+            'coordinates': {} if event_type == 'STOP' else {'x': float(rng.randint(-99, 99)), 'y': float(rng.randint(-42, 42))},
+        }
+        if event_type != 'STOP':
+            play['team'] = {'id': team[0], 'name': team[1], 'link': f'/api/v1/teams/{team[0]}', 'triCode': team[2]}
+            play['players'] = [{'player': {'id': player['id'], 'fullName': player['fullName']}, 'playerType': player_type}
+                               for player, player_type in zip(rng.sample(team_players, 2), ['Shooter', 'Goalie'])]
+        if event_type in ('SHOT', 'GOAL'):
+            play['result']['secondaryType'] = rng.choice(SHOT_TYPES)
+        if event_type == 'GOAL':
+            code, name = rng.choice(STRENGTHS)
+            play['result']['strength'] = {'code': code, 'name': name}
+            play['result']['gameWinningGoal'] = False
+            play['result']['emptyNet'] = rng.random() < 0.05
+        plays.append(play)
+
+    periods = []
+    for period in range(1, nb_of_periods + 1):
+        home_side = first_home_side if period % 2 == 1 else ('left' if first_home_side == 'right' else 'right')
+        away_side = 'left' if home_side == 'right' else 'right'
+        periods.append({'periodType': 'REGULAR' if period <= 3 else 'OVERTIME', 'num': period, 'ordinalNum': f'{period}',
+                        'home': {'goals': 1, 'shotsOnGoal': 10, 'rinkSide': home_side},
+                        'away': {'goals': 1, 'shotsOnGoal': 9, 'rinkSide': away_side}})
+
+    scoring_plays = [play['about']['eventIdx'] for play in plays if play['result']['eventTypeId'] == 'GOAL']
+    plays_by_period = [{'startIndex': 0, 'plays': [play['about']['eventIdx'] for play in plays if play['about']['period'] == period],
+                        'endIndex': nb_of_plays - 1} for period in range(1, nb_of_periods + 1)]
+
+    return {
+        'copyright': 'NHL and the NHL Shield are registered trademarks of the National Hockey League.',
+        'gamePk': game_id,
+        'link': f'/api/v1/game/{game_id}/feed/live',
+        'gameData': {
+            'game': {'pk': game_id, 'season': f'{str(game_id)[:4]}{int(str(game_id)[:4]) + 1}', 'type': 'P' if is_playoff else 'R'},
+            'datetime': {'dateTime': '2017-10-04T23:00:00Z', 'endDateTime': '2017-10-05T01:30:00Z'},
+            'status': {'abstractGameState': 'Final', 'codedGameState': '7', 'detailedState': 'Final', 'statusCode': '7'},
+            'teams': {side: {'id': team[0], 'name': team[1], 'abbreviation': team[2], 'triCode': team[2]}
+                      for side, team in (('home', home), ('away', away))},
+            'players': players,
+            'venue': {'name': f'{home[1]} Arena'},
+        },
+        'liveData': {
+            'plays': {'allPlays': plays, 'scoringPlays': scoring_plays, 'penaltyPlays': [], 'playsByPeriod': plays_by_period,
+                      'currentPlay': plays[-1]},
+            'linescore': {'currentPeriod': nb_of_periods, 'currentPeriodOrdinal': f'{nb_of_periods}', 'currentPeriodTimeRemaining': 'Final',
+                          'periods': periods, 'shootoutInfo': {'away': {'scores': 0, 'attempts': 0}, 'home': {'scores': 0, 'attempts': 0}},
+                          'teams': {side: {'team': {'id': team[0], 'name': team[1]}, 'goals': 2, 'shotsOnGoal': 30}
+                                    for side, team in (('home', home), ('away', away))},
+                          'hasShootout': has_shootout},
+            'boxscore': {'teams': {side: {'team': {'id': team[0]}, 'players': {key: {'person': player, 'stats': {'skaterStats': {'timeOnIce': '15:00', 'shots': 2}}}
+                                                                               for key, player in players.items() if player['currentTeam']['id'] == team[0]}}
+                                   for side, team in (('home', home), ('away', away))}},
+        },
+    }
+
+
+def build_fake_season_games(year: int, nb_of_games: int, seed: int = 6758) -> dict:
+    """
+    Returns: A dictionary where the key is the game id (int) and the value the json string of the game, nb_of_games regular season games
+        followed by 15 playoff series
+    """
+    rng = random.Random(seed + year)
+    game_ids = [int(f'{year}02{game:04d}') for game in range(1, nb_of_games + 1)]
+    for playoff_round, nb_of_matchup in enumerate([8, 4, 2, 1], start=1):
+        for matchup in range(1, nb_of_matchup + 1):
+            for game in range(1, rng.randint(4, 7) + 1):
+                game_ids.append(int(f'{year}030{playoff_round}{matchup}{game}'))
+    return {game_id: json.dumps(build_fake_game(game_id, rng), indent=2) for game_id in game_ids}
+
+
+def write_fake_season_file(path_to_file: str, year: int, nb_of_games: int, compression: str = 'gzip'):
+    """
+    Write a fake season in a season file, as StatsApiProxy would.
+    """
+    from src.SeasonFile import SeasonFileWriter
+
+    with SeasonFileWriter(path_to_file, resume=False, compression=compression) as season_file:
+        for game_id, json_game in build_fake_season_games(year, nb_of_games).items():
+            teams = json.loads(json_game)['gameData']['teams']
+            season_file.add_game(game_id, json_game, {'home': teams['home']['id'], 'away': teams['away']['id']})
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# half of the rink where the shots are binned, in feet: the shots of both sides are folded on the offensive zone (x = |x|)
+RINK_X_RANGE = (0.0, 100.0)
+RINK_Y_RANGE = (-42.5, 42.5)
+
+
+# bins every shot of the league at once in a (team, x bin, y bin) tensor of shot counts, in one np.bincount
+# the shots outside of the rink or without coordinates are ignored
+def bin_league_shots(team_ids: np.ndarray, x: np.ndarray, y: np.ndarray, bin_size: float = 5.0, fold: bool = True) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    team_ids = np.asarray(team_ids)
+    x = np.abs(np.asarray(x, dtype=float)) if fold else np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_edges = np.arange(RINK_X_RANGE[0], RINK_X_RANGE[1] + bin_size / 2, bin_size)
+    y_edges = np.arange(RINK_Y_RANGE[0], RINK_Y_RANGE[1] + bin_size / 2, bin_size)
+    nb_of_x_bins, nb_of_y_bins = len(x_edges) - 1, len(y_edges) - 1
+
+    # the last bin includes its upper edge, like np.histogram2d
+    x_bins = np.where(x == x_edges[-1], nb_of_x_bins - 1, np.floor((x - x_edges[0]) / bin_size))
+    y_bins = np.where(y == y_edges[-1], nb_of_y_bins - 1, np.floor((y - y_edges[0]) / bin_size))
+    in_rink = (x_bins >= 0) & (x_bins < nb_of_x_bins) & (y_bins >= 0) & (y_bins < nb_of_y_bins) & ~pd.isna(team_ids)
+
+    teams, team_bins = np.unique(team_ids[in_rink].astype('int64'), return_inverse=True)
+    flat_bins = (team_bins * nb_of_x_bins + x_bins[in_rink].astype('int64')) * nb_of_y_bins + y_bins[in_rink].astype('int64')
+    counts = np.bincount(flat_bins, minlength=len(teams) * nb_of_x_bins * nb_of_y_bins)
+    return teams, counts.reshape(len(teams), nb_of_x_bins, nb_of_y_bins), x_edges, y_edges
+
+
+# shots per hour of every team in every bin minus the shots per hour of the league (all the shots of the league divided by the time played by
+# all the teams), hours_played is the time played by every team of counts, in hours
+def compute_excess_rates(counts: np.ndarray, hours_played: np.ndarray) -> np.ndarray:
+    hours_played = np.asarray(hours_played, dtype=float)
+    rates = np.divide(counts, hours_played[:, None, None], out=np.zeros(counts.shape), where=hours_played[:, None, None] > 0)
+    league_rate = counts.sum(axis=0) / hours_played.sum()
+    return rates - league_rate
+
+
+# gaussian smoothing of the last two axes of the maps (sigma in bins) with one fft per map, the maps are padded with zeros so the
+# shots don't wrap around the rink
+def gaussian_smooth(maps: np.ndarray, sigma: float) -> np.ndarray:
+    radius = max(int(np.ceil(4 * sigma)), 1)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    kernel = np.outer(kernel, kernel)
+    kernel /= kernel.sum()
+
+    nb_of_x_bins, nb_of_y_bins = maps.shape[-2:]
+    shape = (nb_of_x_bins + 2 * radius, nb_of_y_bins + 2 * radius)
+    smoothed = np.fft.irfft2(np.fft.rfft2(maps, s=shape) * np.fft.rfft2(kernel, s=shape), s=shape)
+    return smoothed[..., radius:radius + nb_of_x_bins, radius:radius + nb_of_y_bins]
+
+
+# excess shot rate maps of every team of the dataframe of the plays (see DataExtractor.get_season_into_dataframe). time_played is the time played
+# by every team in minutes (see DataExtractor.get_time_played_by_team). Returns a dictionary with the team ids, the (team, x bin, y bin) tensors of
+# the shot counts and of the excess rates (smoothed if sigma is given, in bins) and the edges of the bins.
+def compute_shot_maps(df: pd.DataFrame, time_played: pd.Series, bin_size: float = 5.0, sigma: float = None) -> dict:
+    teams, counts, x_edges, y_edges = bin_league_shots(df['team.id'].to_numpy(), df['coordinates.x'].to_numpy(), df['coordinates.y'].to_numpy(), bin_size)
+    hours_played = time_played.reindex(teams, fill_value=0).to_numpy() / 60
+    excess = compute_excess_rates(counts, hours_played)
+    if sigma is not None:
+        excess = gaussian_smooth(excess, sigma)
+    return {'team_ids': teams, 'counts': counts, 'excess': excess, 'x_edges': x_edges, 'y_edges': y_edges}
+
+
+# excess shot rate map of one team of compute_shot_maps
+def get_team_excess(shot_maps: dict, team_id: int) -> np.ndarray:
+    position = np.searchsorted(shot_maps['team_ids'], team_id)
+    if position == len(shot_maps['team_ids']) or shot_maps['team_ids'][position] != team_id:
+        raise KeyError(team_id)
+    return shot_maps['excess'][position]
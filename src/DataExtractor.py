@@ -2,39 +2,247 @@ import pandas as pd
 import numpy as np
 import os
 import os as path
-import json
 import requests
 import warnings
+import gzip
+import glob
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from src import JsonBackend
+from src.FeedDecoder import FeedDecoder
+from src.SeasonFile import LazySeason, SeasonFileReader, is_season_file, is_gzip_file
+from src.TeamShotIndex import TeamShotIndex
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
 warnings.filterwarnings("ignore")
 
+# version of the dataframe built by get_season_into_dataframe, to increase when its columns or types change so the cached dataframes are rebuilt
+DATAFRAME_VERSION = 5
+
+#"MM:SS" times of the plays to seconds
+def period_time_to_seconds(period_times: pd.Series) -> pd.Series:
+    return pd.Series([int(time[:-3]) * 60 + int(time[-2:]) for time in period_times], index=period_times.index, dtype='int16')
+
+
+# columns of the dataframe built by get_season_into_dataframe: (name, path of the value in the play, value when the path is not in the play,
+# type of the column, a function that converts the column or None to let pandas choose). An int in the path is a position in a list, 0 is the
+# first element and -1 the last one (the first player of a shot is the shooter and the last one the goalie). More columns can be added with
+# DataExtractor.register_column. The types are the smallest that hold the values of the feeds: the strings are categories, the time of the
+# plays is in seconds since the start of the period and emptyNet is missing (NA) for the shots that are not goals.
+PLAY_COLUMNS = [
+    ('about.periodTime', ('about', 'periodTime'), None, period_time_to_seconds),
+    ('about.eventId', ('about', 'eventId'), None, 'int32'),
+    ('about.eventIdx', ('about', 'eventIdx'), None, 'int16'),
+    ('about.period', ('about', 'period'), None, 'int8'),
+    ('team.name', ('team', 'name'), None, 'category'),
+    ('team.id', ('team', 'id'), None, 'Int16'),
+    ('result.eventTypeId', ('result', 'eventTypeId'), None, 'category'),
+    ('coordinates.x', ('coordinates', 'x'), None, 'float32'),
+    ('coordinates.y', ('coordinates', 'y'), None, 'float32'),
+    ('players.0.player.fullName', ('players', 0, 'player', 'fullName'), None, 'category'),
+    ('players.1.player.fullName', ('players', -1, 'player', 'fullName'), None, 'category'),
+    ('result.secondaryType', ('result', 'secondaryType'), None, 'category'),
+    ('result.strength.code', ('result', 'strength', 'code'), None, 'category'),
+    ('result.emptyNet', ('result', 'emptyNet'), None, 'boolean'),
+]
+
+# positions in the lists of the dotted paths of register_column: players.0 is the first player and players.1 the last one
+DOTTED_PATH_POSITIONS = {'0': 0, '1': -1}
+
+# categorical columns that share their categories, the shooters and the goalies are in the same dictionary of players (see share_categories)
+SHARED_CATEGORIES = [['players.0.player.fullName', 'players.1.player.fullName']]
+
+# eventTypeId of the plays kept in the dataframes (SHOT, GOAL, MISSED_SHOT, BLOCKED_SHOT, FACEOFF, HIT, ...)
+SHOT_EVENT_TYPES = frozenset({'SHOT', 'GOAL'})
+
+# columns added after the columns of the plays: the game of the play, the side of the team of the play (home or away) and the side of the
+# rink it attacks (left or right, see DataExtractor.__extract_side_columns)
+GAME_COLUMNS = [('ID', 'int32'), ('gamePk', 'int32'), ('away_or_home', 'category'), ('rinkSide', 'category')]
+
+# columns of the game index of a season (see DataExtractor.get_game_index): one row per game with its type (R or P), its date, its teams,
+# its status (detailedState), the number of periods played (without the shootout) and the rink side of the home team in every period (from the
+# linescore), if it ended in a shootout, the time played in its last period, its duration in seconds (see REGULATION_PERIOD_LENGTH) and the goals
+# and shots on goal of the teams at the end of the game
+GAME_INDEX_COLUMNS = [
+    ('gamePk', 'int64'),
+    ('type', None),
+    ('date', None),
+    ('homeTeamId', 'int64'),
+    ('awayTeamId', 'int64'),
+    ('homeTeamAbbreviation', None),
+    ('awayTeamAbbreviation', None),
+    ('status', None),
+    ('periods', 'int64'),
+    ('homeRinkSides', None),
+    ('hasShootout', 'bool'),
+    ('lastPeriodTime', 'int64'),
+    ('duration', 'int64'),
+    ('homeGoals', 'int64'),
+    ('awayGoals', 'int64'),
+    ('homeShotsOnGoal', 'int64'),
+    ('awayShotsOnGoal', 'int64'),
+]
+
+# type of the games (gameData.game.type) by the 5th and 6th digits of their id: preseason, regular season, playoffs and all-star games
+GAME_TYPES = {1: 'PR', 2: 'R', 3: 'P', 4: 'A'}
+
+# side of the rink attacked by the home team in every period when the linescore of the game has no rinkSide: the right side in the periods 1,
+# 3 and 5 and the left side in the periods 2 and 4
+DEFAULT_HOME_ATTACKED_SIDES = {1: 'right', 2: 'left', 3: 'right', 4: 'left', 5: 'right'}
+OPPOSITE_SIDES = {'left': 'right', 'right': 'left'}
+
+# length in seconds of the periods: 3 periods of 20 minutes, then overtimes of 5 minutes in the regular season (followed by a shootout that is
+# not played time) and of 20 minutes in the playoffs. The last overtime ends at the winning goal.
+REGULATION_PERIOD_LENGTH = 1200
+REGULAR_SEASON_OVERTIME_LENGTH = 300
+PLAYOFF_OVERTIME_LENGTH = 1200
+
+def get_game_type(game_id) -> str:
+    return GAME_TYPES.get(int(game_id) // 10**4 % 100)
+
+
+#the categorical columns of the dataframes get the union of their categories in all the dataframes, and the columns of SHARED_CATEGORIES the
+#union of the categories of the columns of their group, so the dataframes are concatenated without turning the categories into strings
+#(pd.concat keeps a categorical column only if its categories are the same in every dataframe)
+def share_categories(dfs: list) -> list:
+    dfs = list(dfs)
+    columns = [column for column in (dfs[0].columns if dfs else []) if isinstance(dfs[0][column].dtype, pd.CategoricalDtype)]
+    groups = [group for group in SHARED_CATEGORIES if all(column in columns for column in group)]
+    groups += [[column] for column in columns if not any(column in group for group in groups)]
+    dtypes = {}
+    for group in groups:
+        categories = set()
+        for df in dfs:
+            for column in group:
+                categories.update(df[column].cat.categories)
+        dtypes.update({column: pd.CategoricalDtype(sorted(categories)) for column in group})
+    return [df.astype(dtypes) for df in dfs]
+
+
 class DataExtractor():
-    def __init__(self):
-        self.all_games_in_season = None # save the dictionary to access more informations later
+    def __init__(self, path_to_directory: str = '../notebooks/hockey', event_types: set = SHOT_EVENT_TYPES):
+        self.paths_to_season_files = {} # season files of the dataframes of the extractor, their game indexes are read when needed
+        self.path_to_directory = path_to_directory # directory where StatsApiProxy downloaded the seasons
+        self.event_types = frozenset(event_types) # eventTypeId of the plays kept by clean_single_game_json
+        self.__columns = list(PLAY_COLUMNS) # columns of the plays, see PLAY_COLUMNS
+        self.__game_indexes = {} # game indexes already built, by path of their cache
+        self.__team_shot_index = None # (dataframe, index of its shots by team) of the last dataframe given to get_team_shot_index
+        self.__team_games = None # (dataframe, games of every team of the dataframe with their duration) of the last dataframe
+        self.__compile_columns()
+
+
+    #add a column to the dataframes of the plays. path is the path of the value in the play, as in PLAY_COLUMNS ('about.period' or
+    #('players', 0, 'player', 'id')), or a function that takes the play and returns the value. In a dotted path, 0 is the first element of a
+    #list and 1 the last one, as in the names of the columns ('players.1.player.id' is the goalie), other positions need a tuple. dtype is the
+    #type of the column or a function that converts the column. The column replaces a column with the same name.
+    def register_column(self, name: str, path, default=None, dtype=None):
+        if isinstance(path, str):
+            path = tuple(DOTTED_PATH_POSITIONS.get(key, key) for key in path.split('.'))
+        self.__columns = [column for column in self.__columns if column[0] != name] + [(name, path, default, dtype)]
+        self.__compile_columns()
+
+
+    #the path of every column is turned once into a function that reads the value in a play, the rows of the plays are built by calling them
+    #the games are decoded with only the values of these paths, or completely if a column is a function (see FeedDecoder)
+    def __compile_columns(self):
+        getters = [path if callable(path) else self.__compile_path(path, default) for name, path, default, dtype in self.__columns]
+        paths = [path for name, path, default, dtype in self.__columns]
+        self.__feed_decoder = FeedDecoder(None if any(callable(path) for path in paths) else paths)
+        self.__extract_play_row = lambda play: [get(play) for get in getters]
+        self.__column_names = [column[0] for column in self.__columns] + [name for name, dtype in GAME_COLUMNS]
+        self.__column_types = {column[0]: column[3] for column in self.__columns if column[3] is not None and not callable(column[3])}
+        self.__column_types.update((name, dtype) for name, dtype in GAME_COLUMNS if dtype is not None)
+        self.__column_converters = {column[0]: column[3] for column in self.__columns if callable(column[3])}
+
+
+    #the paths of 1 to 4 keys (every column of PLAY_COLUMNS) are read without a loop
+    def __compile_path(self, path: tuple, default=None):
+        errors = (KeyError, IndexError, TypeError)
+        if len(path) == 1:
+            (k0,) = path
+            def get(play):
+                try:
+                    return play[k0]
+                except errors:
+                    return default
+        elif len(path) == 2:
+            k0, k1 = path
+            def get(play):
+                try:
+                    return play[k0][k1]
+                except errors:
+                    return default
+        elif len(path) == 3:
+            k0, k1, k2 = path
+            def get(play):
+                try:
+                    return play[k0][k1][k2]
+                except errors:
+                    return default
+        elif len(path) == 4:
+            k0, k1, k2, k3 = path
+            def get(play):
+                try:
+                    return play[k0][k1][k2][k3]
+                except errors:
+                    return default
+        else:
+            def get(play):
+                try:
+                    for key in path:
+                        play = play[key]
+                    return play
+                except errors:
+                    return default
+        return get
+
+
+    #the columns are part of the name of the cached dataframes, a function is identified by its name and its code
+    def __get_columns_key(self) -> str:
+        def describe(path):
+            if not callable(path):
+                return repr(path)
+            code = getattr(path, '__code__', None)
+            return f'{getattr(path, "__module__", "")}.{getattr(path, "__qualname__", repr(path))}:{code.co_code.hex() if code else ""}'
+        return ';'.join(f'{name}|{describe(path)}|{default!r}|{describe(dtype)}' for name, path, default, dtype in self.__columns)
+
+    
+    #path of the file that contains all the games of a season
+    def get_season_file_path(self, year: int) -> str:
+        return f"{self.path_to_directory}/Season{year}{year+1}/season{year}{year+1}.games"
     
     
+    #only the games of the team are read, they are found in the game index of the season
     def get_season_data_for_team(self, year: int, team_id: int) -> dict:
-        season_data = self.get_season_data(year)
-        
-        team_dict = {}
-        for game_id in season_data:
-            team_1 = season_data[game_id]['gameData']['teams']['away']['id']
-            team_2 = season_data[game_id]['gameData']['teams']['home']['id']
-            
-            if team_1 == team_id: # could be regrouped
-                team_dict[game_id] = season_data[game_id]
-                continue
-            elif team_2 == team_id:
-                team_dict[game_id] = season_data[game_id]
-                continue
-        return team_dict
+        game_index = self.get_game_index(year)
+        game_ids = game_index.loc[(game_index['homeTeamId'] == team_id) | (game_index['awayTeamId'] == team_id), 'gamePk']
+        with SeasonFileReader(self.get_season_file_path(year)) as season_file:
+            return {str(game_id): season_file.get_game(game_id) for game_id in game_ids}
+    
+    
+    #table of the games of a season (year or path to a season file or a season json file), see GAME_INDEX_COLUMNS. It is built with the
+    #dataframe of the plays by get_season_into_dataframe, or by reading every game of the season, and cached next to the season file
+    def get_game_index(self, season) -> pd.DataFrame:
+        path_to_file = self.get_season_file_path(season) if isinstance(season, int) else season
+        path_to_cache = self.__get_game_index_cache_path(path_to_file)
+        if path_to_cache not in self.__game_indexes:
+            if pyarrow is not None and os.path.exists(path_to_cache):
+                self.__game_indexes[path_to_cache] = pd.read_parquet(path_to_cache)
+            else:
+                games = self.__read_games(path_to_file)
+                self.__save_game_index(self.__build_game_index([self.__extract_game_row(game) for game in games]), path_to_cache)
+        return self.__game_indexes[path_to_cache]
     
     
     #function that takes the season to be downloaded and returns a dictionary containing the entirety of the games played during year
+    #the games are only read from the season file when they are accessed (see LazySeason)
     def get_season_data(self, year: int) -> dict:
-        with open(f"../notebooks/hockey/Season{year}{year+1}/season{year}{year+1}.json", 'r') as j:
-            entire_season = json.loads(j.read())
-        return entire_season
+        return self.get_game_data(self.get_season_file_path(year))
     
     
     ############################################################# ONLY USED IN QUESTION_2.PY
@@ -61,83 +269,347 @@ class DataExtractor():
 
 
     #Get the file that contains all the play of a season
-    def get_season_into_dataframe(self, path_to_file: str) -> pd.DataFrame:
-        all_games_in_season = self.get_game_data(path_to_file)
-        self.all_games_in_season = all_games_in_season
-        df_season = pd.DataFrame()
+    #The dataframe is cached in a parquet file next to the season file (if pyarrow is installed), the cache is rebuilt when the season file
+    #or DATAFRAME_VERSION changes. columns allows to read only some of the columns of the cache.
+    def get_season_into_dataframe(self, path_to_file: str, columns: list = None, use_cache: bool = True) -> pd.DataFrame:
+        self.paths_to_season_files[path_to_file] = None
+        use_cache = use_cache and pyarrow is not None
         
-        for game in all_games_in_season:
-            game_pk, clean_game = self.clean_single_game_json(all_games_in_season.get(game))
-            df_game = self.create_panda_dataframe_for_one_game(game_pk, clean_game)
-            df_season = df_season.append(df_game)
-            df_season.reset_index(drop=True, inplace=True)
-        df_season['about.eventIdx'] = df_season['about.eventIdx'].astype(str).astype(int)
-        df_season['coordinates.x'] = df_season['coordinates.x'].astype(str).astype(float)
-        df_season['coordinates.y'] = df_season['coordinates.y'].astype(str).astype(float)
+        path_to_cache = self.__get_dataframe_cache_path(path_to_file)
+        if use_cache and os.path.exists(path_to_cache):
+            return pd.read_parquet(path_to_cache, columns=columns)
         
-        return df_season
+        df_season, game_index = self.__build_season_dataframe(self.__read_games(path_to_file))
+        self.__save_game_index(game_index, self.__get_game_index_cache_path(path_to_file))
+        if use_cache:
+            self.__save_dataframe_cache(df_season, path_to_cache)
+        return df_season if columns is None else df_season[columns]
     
     
-    # get all shots of one specific team 
-    def get_team_shots_from_dataframe(self, df: pd.DataFrame, team_id: int) -> np.array:
-        df.rename(columns={
-            'team.id': 'teamID', 
-            'coordinates.x': 'coordinatesX',
-            'coordinates.y': 'coordinatesY'
-            }, inplace=True)
+    #Get the plays of several seasons (years or paths to season files, season json files or game files) in one dataframe, sorted by
+    #gamePk and about.eventIdx. The games of the seasons are split in chunks of chunk_size games that are extracted by max_workers processes
+    #(os.cpu_count() if None, no process is started if 1). The functions given to register_column must be picklable to use processes.
+    #The dataframe of every season is cached as in get_season_into_dataframe.
+    def get_seasons_into_dataframe(self, seasons: list, max_workers: int = None, chunk_size: int = 100, columns: list = None,
+                                   use_cache: bool = True) -> pd.DataFrame:
+        use_cache = use_cache and pyarrow is not None
+        paths_to_files = self.__get_season_paths(seasons)
+        
+        df_seasons = {}
+        tasks = []
+        for path_to_file in paths_to_files:
+            if use_cache and os.path.exists(self.__get_dataframe_cache_path(path_to_file)):
+                df_seasons[path_to_file] = pd.read_parquet(self.__get_dataframe_cache_path(path_to_file))
+            elif is_season_file(path_to_file):
+                with SeasonFileReader(path_to_file) as season_file:
+                    game_ids = sorted(season_file.game_ids())
+                tasks += [(path_to_file, game_ids[i:i + chunk_size]) for i in range(0, len(game_ids), chunk_size)]
+            else:
+                tasks.append((path_to_file, None))
         
-        df = df[df.teamID == team_id]
-        df = df.loc[:, ['coordinatesX', 'coordinatesY']]
+        if max_workers == 1 or len(tasks) <= 1:
+            results = [self.extract_games(path_to_file, game_ids) for path_to_file, game_ids in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self.extract_games, *zip(*tasks)))
+        
+        for path_to_file in dict.fromkeys(path_to_file for path_to_file, game_ids in tasks):
+            df_season = pd.concat(share_categories(df for (path, game_ids), (df, game_index) in zip(tasks, results) if path == path_to_file),
+                                  ignore_index=True)
+            game_index = pd.concat([game_index for (path, game_ids), (df, game_index) in zip(tasks, results) if path == path_to_file], ignore_index=True)
+            self.__save_game_index(game_index, self.__get_game_index_cache_path(path_to_file))
+            if use_cache:
+                self.__save_dataframe_cache(df_season, self.__get_dataframe_cache_path(path_to_file))
+            df_seasons[path_to_file] = df_season
         
-        df = df.dropna()
-        return np.array(df['coordinatesX']), np.array(df['coordinatesY'])
+        df = pd.concat(share_categories(df_seasons[path_to_file] for path_to_file in paths_to_files), ignore_index=True)
+        df = df.sort_values(['gamePk', 'about.eventIdx'], kind='stable', ignore_index=True)
+        return df if columns is None else df[columns]
+    
+    
+    #Get the plays and the game index of some games of a file (every game if game_ids is None), the file can be a season file, a season json
+    #file or a game file
+    def extract_games(self, path_to_file: str, game_ids: list = None) -> (pd.DataFrame, pd.DataFrame):
+        return self.__build_season_dataframe(self.__read_games(path_to_file, game_ids))
+    
+    
+    #Iterate over the games of several seasons (years or paths to season files, season json files or game files), read one at a time from the
+    #disk. Only the games whose type is in game_types are read if it is given ('R' for the regular season and 'P' for the playoffs, see
+    #GAME_TYPES). The games are complete, as in get_season_data.
+    def iter_games(self, seasons: list, game_types: set = None):
+        decoder = FeedDecoder()
+        for path_to_file in self.__get_season_paths(seasons):
+            yield from self.__read_games(path_to_file, game_types=game_types, decoder=decoder)
+    
+    
+    #Iterate over the plays of event_types of the games of several seasons (see iter_games), as dictionaries with the columns of the dataframes
+    #of get_season_into_dataframe and the values of the feeds (before the types of the columns). The games are read one at a time with only
+    #the values of the columns (see FeedDecoder).
+    def iter_shot_events(self, seasons: list, game_types: set = None):
+        for path_to_file in self.__get_season_paths(seasons):
+            for game in self.__read_games(path_to_file, game_types=game_types):
+                home_team_id, home_sides = self.__get_home_attacked_sides(game)
+                game_pk, plays = self.clean_single_game_json(game)
+                for play in plays:
+                    row = self.__extract_play_row(play) + [game_pk, game_pk] + self.__extract_side_columns(play, home_team_id, home_sides)
+                    yield dict(zip(self.__column_names, row))
+    
+    
+    #Iterate over the plays of several seasons (see iter_games) in dataframes of the plays of chunk_size games (the last one can have less
+    #games), with the columns and the types of get_season_into_dataframe. The games are read one at a time and only the dataframe of one chunk
+    #is in memory, the aggregations over several seasons are done chunk by chunk. The dataframes are not cached, the categories of their
+    #categorical columns are the categories of the chunk (see share_categories to concatenate them).
+    def iter_season_dataframes(self, seasons: list, chunk_size: int = 100, game_types: set = None, columns: list = None):
+        games = itertools.chain.from_iterable(self.__read_games(path_to_file, game_types=game_types)
+                                              for path_to_file in self.__get_season_paths(seasons))
+        while True:
+            df_chunk, game_index = self.__build_season_dataframe(itertools.islice(games, chunk_size))
+            if len(game_index) == 0:
+                return
+            yield df_chunk if columns is None else df_chunk[columns]
+    
+    
+    #the paths of the season files of seasons, a season is a year or a path. The season files are kept to find the game indexes of the dataframes
+    def __get_season_paths(self, seasons: list) -> list:
+        paths_to_files = [self.get_season_file_path(season) if isinstance(season, int) else season for season in seasons]
+        self.paths_to_season_files.update(dict.fromkeys(paths_to_files))
+        return paths_to_files
+    
     
+    #the games of a file (every game if game_ids is None, only the games of game_types if given) decoded one at a time with only the values
+    #used by the dataframes (see FeedDecoder), the plays of other types than event_types only have their type, period and time. The file can
+    #be a season file, a season json file or a game file
+    def __read_games(self, path_to_file: str, game_ids: list = None, game_types: set = None, decoder: FeedDecoder = None):
+        decoder = self.__feed_decoder if decoder is None else decoder
+        if is_season_file(path_to_file):
+            with SeasonFileReader(path_to_file) as season_file:
+                for game_id in (season_file.game_ids() if game_ids is None else game_ids):
+                    if game_types is None or get_game_type(game_id) in game_types:
+                        yield decoder.decode_game(season_file.get_game_bytes(game_id), self.event_types)
+            return
+        with (gzip.open(path_to_file, 'rb') if is_gzip_file(path_to_file) else open(path_to_file, 'rb')) as file:
+            data = file.read()
+        for game in decoder.iter_games(data, game_ids, self.event_types):
+            if game_types is None or get_game_type(game['gamePk']) in game_types:
+                yield game
     
-    # get total time played of one specific team 
+    
+    #the compiled columns, the decoder of the games and the game indexes are not sent to the processes of get_seasons_into_dataframe
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_DataExtractor__game_indexes'] = {}
+        state['_DataExtractor__team_shot_index'] = None
+        state['_DataExtractor__team_games'] = None
+        del state['_DataExtractor__extract_play_row']
+        del state['_DataExtractor__feed_decoder']
+        return state
+    
+    
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.__compile_columns()
+    
+    
+    # the plays of every game are collected in one list and the dataframe is built once, with its types, at the end
+    # (appending the dataframe of every game to the season copied the whole season again for each game)
+    # the game index of the games is built in the same pass, the games are not kept after their plays are extracted
+    def __build_season_dataframe(self, games) -> (pd.DataFrame, pd.DataFrame):
+        rows = []
+        game_rows = []
+        for game in games:
+            game_rows.append(self.__extract_game_row(game))
+            home_team_id, home_sides = self.__get_home_attacked_sides(game)
+            game_pk, clean_game = self.clean_single_game_json(game)
+            for play_data in clean_game:
+                side_columns = self.__extract_side_columns(play_data, home_team_id, home_sides)
+                rows.append(self.__extract_play_row(play_data) + [game_pk, game_pk] + side_columns)
+
+        df_season = pd.DataFrame(rows, columns=self.__column_names)
+        for name, convert in self.__column_converters.items():
+            df_season[name] = convert(df_season[name])
+        return share_categories([df_season.astype(self.__column_types)])[0], self.__build_game_index(game_rows)
+    
+    
+    # the duration of the game is computed for the whole game index in __build_game_index
+    def __extract_game_row(self, game: dict) -> list:
+        game_data = game['gameData']
+        teams = game_data['teams']
+        linescore = game['liveData'].get('linescore') or {}
+        periods = [period for period in (linescore.get('periods') or []) if period.get('periodType') != 'SHOOTOUT']
+        linescore_teams = linescore.get('teams') or {}
+        home, away = linescore_teams.get('home') or {}, linescore_teams.get('away') or {}
+        return [game['gamePk'], (game_data.get('game') or {}).get('type'), (game_data.get('datetime') or {}).get('dateTime'),
+                teams['home']['id'], teams['away']['id'], teams['home'].get('abbreviation'), teams['away'].get('abbreviation'),
+                (game_data.get('status') or {}).get('detailedState'), len(periods), [(period.get('home') or {}).get('rinkSide') for period in periods],
+                bool(linescore.get('hasShootout', False)), self.__get_period_time_played(game, len(periods)), 0,
+                home.get('goals', 0), away.get('goals', 0), home.get('shotsOnGoal', 0), away.get('shotsOnGoal', 0)]
+    
+    
+    # id of the home team and side of the rink attacked by the home team in every period. The home team defends the side of its rinkSide in the
+    # linescore and attacks the other side, DEFAULT_HOME_ATTACKED_SIDES is used for the periods without rinkSide
+    def __get_home_attacked_sides(self, game: dict) -> (int, dict):
+        linescore = game['liveData'].get('linescore') or {}
+        periods = [period for period in (linescore.get('periods') or []) if period.get('periodType') != 'SHOOTOUT']
+        home_sides = dict(DEFAULT_HOME_ATTACKED_SIDES)
+        for number, period in enumerate(periods, start=1):
+            rink_side = (period.get('home') or {}).get('rinkSide')
+            if rink_side in OPPOSITE_SIDES:
+                home_sides[number] = OPPOSITE_SIDES[rink_side]
+        return game['gameData']['teams']['home']['id'], home_sides
+    
+    
+    # away_or_home and rinkSide of a play: the side of the team of the play and the side of the rink attacked by the team in the period of the play
+    def __extract_side_columns(self, play: dict, home_team_id: int, home_sides: dict) -> list:
+        home_side = home_sides.get(play['about']['period'])
+        if play.get('team', {}).get('id') == home_team_id:
+            return ['home', home_side]
+        return ['away', OPPOSITE_SIDES.get(home_side)]
+    
+    
+    # time played in a period, the time of its last play (the plays of the period are found with playsByPeriod)
+    def __get_period_time_played(self, game: dict, period: int) -> int:
+        plays = game['liveData']['plays']
+        all_plays = plays['allPlays']
+        plays_by_period = plays.get('playsByPeriod', [])
+        play_indexes = plays_by_period[period - 1]['plays'] if 0 < period <= len(plays_by_period) else range(len(all_plays))
+        period_times = [all_plays[i]['about']['periodTime'] for i in play_indexes if all_plays[i]['about']['period'] == period]
+        if len(period_times) == 0:
+            return 0
+        minutes, seconds = max(period_times).split(':')
+        return int(minutes) * 60 + int(seconds)
+    
+    
+    def __build_game_index(self, game_rows: list) -> pd.DataFrame:
+        game_index = pd.DataFrame(game_rows, columns=[name for name, dtype in GAME_INDEX_COLUMNS])
+        game_index = game_index.astype({name: dtype for name, dtype in GAME_INDEX_COLUMNS if dtype is not None})
+        game_index['date'] = pd.to_datetime(game_index['date'], utc=True)
+
+        periods = game_index['periods'].to_numpy()
+        overtime_length = np.where(game_index['type'].to_numpy() == 'P', PLAYOFF_OVERTIME_LENGTH, REGULAR_SEASON_OVERTIME_LENGTH)
+        nb_of_overtimes = np.maximum(periods - 3, 0)
+        last_overtime = np.where(game_index['hasShootout'].to_numpy(), overtime_length,
+                                 np.minimum(game_index['lastPeriodTime'].to_numpy(), overtime_length))
+        game_index['duration'] = (np.minimum(periods, 3) * REGULATION_PERIOD_LENGTH + np.maximum(nb_of_overtimes - 1, 0) * overtime_length
+                                  + np.where(nb_of_overtimes > 0, last_overtime, 0))
+        return game_index.sort_values('gamePk', ignore_index=True)
+    
+    
+    # the game index only depends on the season file
+    def __get_game_index_cache_path(self, path_to_file: str) -> str:
+        stat = os.stat(path_to_file)
+        key = f'{os.path.abspath(path_to_file)}|{stat.st_mtime_ns}|{stat.st_size}|{DATAFRAME_VERSION}'
+        key = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(os.path.dirname(path_to_file), 'cache', f'{os.path.basename(path_to_file)}.gameindex.{key}.parquet')
+    
+    
+    def __save_game_index(self, game_index: pd.DataFrame, path_to_cache: str):
+        self.__game_indexes[path_to_cache] = game_index
+        if pyarrow is not None:
+            self.__save_dataframe_cache(game_index, path_to_cache)
+    
+    
+    # the name of the cache depends on the season file, its last modification, the event types, the columns and DATAFRAME_VERSION,
+    # the configuration of the extractor (event types and columns) is a separate part of the name, so the caches of other configurations are
+    # not deleted when this one is saved
+    def __get_dataframe_cache_path(self, path_to_file: str) -> str:
+        stat = os.stat(path_to_file)
+        config_key = f'{sorted(self.event_types)}|{self.__get_columns_key()}'
+        config_key = hashlib.sha1(config_key.encode('utf-8')).hexdigest()[:16]
+        key = f'{os.path.abspath(path_to_file)}|{stat.st_mtime_ns}|{stat.st_size}|{DATAFRAME_VERSION}'
+        key = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(os.path.dirname(path_to_file), 'cache', f'{os.path.basename(path_to_file)}.{config_key}.{key}.parquet')
+    
+    
+    # the cache is written in a temporary file first, the outdated caches of the same season file and of the same configuration are deleted
+    # (the dataframes are <season file>.<configuration key>.<key>.parquet and the game indexes <season file>.gameindex.<key>.parquet)
+    def __save_dataframe_cache(self, df: pd.DataFrame, path_to_cache: str):
+        os.makedirs(os.path.dirname(path_to_cache), exist_ok=True)
+        prefix = os.path.basename(path_to_cache).rsplit('.', 2)[0]
+        pattern = f'{glob.escape(prefix)}.{"[0-9a-f]" * 16}.parquet'
+        for path_to_old_cache in glob.glob(os.path.join(glob.escape(os.path.dirname(path_to_cache)), pattern)):
+            os.remove(path_to_old_cache)
+        df.to_parquet(path_to_cache + '.tmp', index=False, engine='pyarrow')
+        os.replace(path_to_cache + '.tmp', path_to_cache)
+    
+    
+    # index of the shots of the dataframe by team (see TeamShotIndex), the index of the last dataframe is kept so the shots of every team
+    # of the league are found with one pass over the dataframe. The dataframe must not be modified after its index is built.
+    def get_team_shot_index(self, df: pd.DataFrame) -> TeamShotIndex:
+        if self.__team_shot_index is None or self.__team_shot_index[0] is not df:
+            self.__team_shot_index = (df, TeamShotIndex(df))
+        return self.__team_shot_index[1]
+    
+    
+    # get all shots of one specific team, the arrays are views of the index of the dataframe and must not be modified
+    def get_team_shots_from_dataframe(self, df: pd.DataFrame, team_id: int) -> np.array:
+        return self.get_team_shot_index(df).get_team_shots(team_id)
+    
+    
+    # get the time played (in minutes) by one specific team in every game of the dataframe, from the duration of the games in the game index
     def get_time_played_from_team_season_dataframe(self, df: pd.DataFrame, team_id: int) -> np.array:
-        time_played = []
-        df.rename(columns={
-            'team.id': 'teamID', 
-            'coordinates.x': 'coordinatesX',
-            'coordinates.y': 'coordinatesY'
-            }, inplace=True)
-        
-        df = df[df.teamID == team_id]
-        count_season_games = df['gamePk'].nunique()
-        
-        for i in range(count_season_games):
-            time_played.append(60)
-        return np.array(time_played)
+        team_games = self.__get_team_games(df)
+        return team_games.loc[team_games['teamId'] == team_id, 'duration'].to_numpy() / 60
+    
+    
+    # get the time played (in minutes) by every team in the games of the dataframe
+    def get_time_played_by_team(self, df: pd.DataFrame) -> pd.Series:
+        return self.__get_team_games(df).groupby('teamId')['duration'].sum() / 60
+    
+    
+    # the games of the dataframe and their duration, once for the home team and once for the away team (the table of the last dataframe is kept)
+    def __get_team_games(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.__team_games is None or self.__team_games[0] is not df:
+            game_index = self.__get_game_index_of_dataframe(df)
+            game_index = game_index[game_index['gamePk'].isin(pd.unique(df['gamePk']))]
+            team_games = pd.concat([
+                pd.DataFrame({'teamId': game_index['homeTeamId'], 'gamePk': game_index['gamePk'], 'duration': game_index['duration']}),
+                pd.DataFrame({'teamId': game_index['awayTeamId'], 'gamePk': game_index['gamePk'], 'duration': game_index['duration']}),
+            ], ignore_index=True)
+            self.__team_games = (df, team_games.sort_values(['teamId', 'gamePk'], ignore_index=True))
+        return self.__team_games[1]
     
     
-    def get_game_data(self, path_to_file) -> dict:
-        file = open(path_to_file, 'r', encoding='utf-8')
-        json_str = file.read()
-        data_dict = json.loads(json_str)
+    # game index of the games of the dataframe, from the game indexes of the season files read by the extractor, or of the seasons of the
+    # directory for the other games
+    def __get_game_index_of_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        game_pks = pd.unique(df['gamePk'])
+        game_indexes = [self.get_game_index(path_to_file) for path_to_file in self.paths_to_season_files]
+        game_indexes = [game_index[game_index['gamePk'].isin(game_pks)] for game_index in game_indexes]
+        known_game_pks = pd.concat(game_indexes)['gamePk'].to_numpy() if game_indexes else []
+        missing_game_pks = np.setdiff1d(game_pks, known_game_pks)
+        game_indexes += [self.get_game_index(int(year)) for year in sorted(pd.unique(missing_game_pks // 10**6))]
+        return pd.concat(game_indexes, ignore_index=True).drop_duplicates('gamePk', ignore_index=True)
+    
+    
+    # reads a game file (that can be compressed with gzip), or a season file (the key of the dictionary is the game id)
+    # if game_id is given, only this game is read from the season file, otherwise the season is opened lazily (see LazySeason)
+    def get_game_data(self, path_to_file, game_id: int = None) -> dict:
+        if is_season_file(path_to_file):
+            if game_id is not None:
+                with SeasonFileReader(path_to_file) as season_file:
+                    return season_file.get_game(game_id)
+            return LazySeason(path_to_file)
+        file = gzip.open(path_to_file, 'rb') if is_gzip_file(path_to_file) else open(path_to_file, 'rb')
+        json_bytes = file.read()
+        data_dict = JsonBackend.loads(json_bytes)
         file.close()
         return data_dict
 
 
-    def clean_single_game_json(self, json_dict: dict) -> (str, dict):
+    #keeps the plays of the game whose eventTypeId is in event_types (self.event_types if None), in one pass over the plays
+    def clean_single_game_json(self, json_dict: dict, event_types: set = None) -> (str, list):
         game_pk = json_dict['gamePk']
         live_data = json_dict['liveData']
-        shot_ID = 'SHOT'
-        goal_ID = 'GOAL'
+        event_types = self.event_types if event_types is None else event_types
 
         play_data = live_data['plays']
-        all_plays_data = np.array(play_data['allPlays'])
+        all_plays_data = play_data['allPlays']
 
         #Is empty when a playoff game wasnt played
         if len(all_plays_data) == 0:
-            return game_pk, {}
-        
-        def create_mask(play):
-            return True if play['result']['eventTypeId'] == shot_ID or play['result']['eventTypeId'] == goal_ID else False
-
-        vf = np.vectorize(create_mask)
-        mask = vf(all_plays_data)
+            return game_pk, []
 
-        return game_pk, all_plays_data[mask]
+        return game_pk, [play for play in all_plays_data if play['result']['eventTypeId'] in event_types]
     
     def count(self,row):
         if row['type_of_shot_id'] == 'SHOT':
@@ -145,48 +617,22 @@ class DataExtractor():
         else:
             return 1
     
-    def compute_distances(self,row):
-        left = np.array([-86,0])
-        right = np.array([86,0])
-        coord= np.array([row['coordinates.x'],row['coordinates.y']] )
-        if row['rinkSide'] == 'left':
-            return np.linalg.norm(coord - left)
-        else:
-            return np.linalg.norm(coord - right)
-        
-    #function to add informations used to compute the distance
-    def distance_helpers(self, row) -> pd.DataFrame:
-        game = self.all_games_in_season[str(row['ID'])]
-        game_period = game['liveData']['plays']['allPlays'][row['about.eventIdx']]['about']['period']
-        home = game['gameData']['teams']['home']['name']
-        away = game['gameData']['teams']['away']['name']
-        def away_or_home(row):
-            if row['team.name'] == home:
-                return 'home'
-            else:
-                return 'away'
-        def rink_side(row):
-            if game_period == 1 or game_period == 3 or game_period == 5:
-
-                if row['away_or_home'] == 'home':
-                    return 'right'
-                else:
-                    return 'left'
-            if game_period == 2 or game_period == 4:
-                if row['away_or_home']== 'home':
-                    return 'left'
-                else:
-                    return 'right'
-
-
-        row['away_or_home'] = away_or_home(row)
-        row['rinkSide'] = rink_side(row)
-        return row
+    #adds the distance (distances) and angle in degrees (angles, 0 in front of the net, 90 on the goal line) of the shots to the net they attack
+    #(rinkSide, extracted with the plays), the dataframe is copied. The net of the left side is at (-86, 0) and the net of the right side at
+    #(86, 0). The dataframe must come from get_season_into_dataframe.
+    def add_distance_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        goal_x = np.where(df['rinkSide'].to_numpy() == 'left', -86.0, 86.0)
+        dx = df['coordinates.x'].to_numpy(dtype=float) - goal_x
+        dy = df['coordinates.y'].to_numpy(dtype=float)
+        df['distances'] = np.sqrt(dx * dx + dy * dy)
+        df['angles'] = np.degrees(np.arctan2(np.abs(dy), -np.sign(goal_x) * dx))
+        return df
     
     
     #Added the column about.eventIdx
     def __generate_dataframe_column_names(self)-> list:
-        return ['about.periodTime', 'about.eventId','about.eventIdx', 'team.name', 'result.eventTypeId', 'coordinates.x', 'coordinates.y', 'players.0.player.fullName', 'players.1.player.fullName', 'result.secondaryType', 'result.strength.code', 'result.emptyNet']
+        return [column[0] for column in self.__columns]
 
 
     def create_panda_dataframe_for_one_game(self, game_pk: str, all_play_data: dict) -> pd.DataFrame:
@@ -201,30 +647,7 @@ class DataExtractor():
         return df
 
     def __extract_play_data_from_dict(self, game_pk: str, full_play_data: dict) -> dict:
-        def extract_path_from_column_name(column_name: str) -> list:
-            return column_name.split(".")
-
-        def extract_value_from_path(path: list, full_play_data: dict):
-            result = full_play_data
-            for i in range(len(path)):
-                try:
-                    if path[i] == str(0):
-                        result = result[0]
-                    elif path[i] == str(1):
-                        result = result[len(result) - 1]
-                    else:
-                        result = result[path[i]]
-                except:
-                    return None
-            return result
-
-        new_dict = {}
-
-        for column in self.__generate_dataframe_column_names():
-            path = extract_path_from_column_name(column)
-            value = extract_value_from_path(path, full_play_data)
-            new_dict[column] = value
-            
+        new_dict = dict(zip(self.__generate_dataframe_column_names(), self.__extract_play_row(full_play_data)))
         new_dict['ID'] = game_pk # Added the game ID to each play to access informations easily
         new_dict['gamePk'] = game_pk
         return new_dict
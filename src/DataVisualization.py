@@ -1,106 +1,119 @@
 import ipywidgets as widgets
 from ipywidgets import interact, SelectMultiple, fixed, Checkbox, IntRangeSlider, IntSlider, FloatSlider
+from IPython.display import display
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import json
 from src.DataExtractor import DataExtractor
+from src.RinkImage import get_rink_image
 
 
 class DataVisualization():
     def __init__(self):
         self.data_extractor = DataExtractor()
-    
-    
+
+
     # A function used in order to plot the coordinates on the rink
-    # It is a separate function from plot_game in order to be able to get the maximum number of games dinamically
+    # The figure and the slider are created once, moving the slider only updates the point and the title of the figure
     def play_visualization(self, game: dict):
-        @interact(
-            play_ID=IntSlider(min=1, max=len(game['liveData']['plays']['allPlays']), value=1, description='Play', continuous_update=True),
-            )
+        play_browser = self.__create_play_browser()
+        play_browser['show_game'](game)
+        display(widgets.VBox([play_browser['slider'], play_browser['view']]))
+
 
-        def plot_visualization_play(play_ID):
-            play = self.data_extractor.get_play_by_ID(game , play_ID-1)
-            img = plt.imread("../figures/nhl_rink.png")
-            fig, ax = plt.subplots()
-            ax.imshow(img, extent=[ -100, 100, -55, 55])
-            coord = game['liveData']['plays']['allPlays'][play_ID-1]['coordinates']
-            print('coordonnées : ',coord)
-            if not coord: 
-                print("no coord")
-            else:
-                plt.scatter(coord['x'], coord['y'])
-            plt.title(game['liveData']['plays']['allPlays'][play_ID-1]['result']['description'])
-            plt.show()
-            
     def season_visualization(self, year: int):
         """
-        
-        Main function of our visualization. Takes the year as input, downloads the dictionary of the specified year. We use widgets.interact
-        in order to create multiple sliders to select a specific game. Then we use widgets.interact a second time in order to be able to
-        select a specific play of the game we have previously selected. 
-        """ 
-        
+
+        Main function of our visualization. Takes the year as input and opens the season of the specified year. Sliders select a specific
+        game, the summary of the game comes from the game index of the season (see DataExtractor.get_game_index), and another slider selects
+        a specific play of the game. The widgets and the figure are created once and updated when a slider moves, the sliders of the game
+        only change the game when they are released (continuous_update=False).
+        """
+
         entire_season = self.data_extractor.get_season_data(year)
-        max_game = len(entire_season) - 105
-        # year=IntSlider(min=2016, max=2020, value=1, description='Game', continuous_update=True)
-        @interact(
-        season_type=IntSlider(min=2, max=3, value=1, description='type', continuous_update=False),
-        game_ID=IntSlider(min=1, max=max_game, value=1, description='Game ID', continuous_update=False),
-        playoff_round = IntSlider(min=1, max=4, value=1, description='Round', continuous_update=False),
-        matchup = IntSlider(min=1, max=8, value=1, description='MatchUp', continuous_update=False),
-        games_num = IntSlider(min=1, max=7, value=1, description='game', continuous_update=False),
-        )
-
-        def plot_game( season_type, game_ID, playoff_round, matchup, games_num):
-            if season_type == 2:
-                game = self.data_extractor.get_game_from_dict(year, game_ID,  season_type, entire_season)
-                home_goals = game['liveData']['linescore']['periods'][-1]['home']['goals']
-                away_goals =game['liveData']['linescore']['periods'][-1]['away']['goals']
-                home_sog = game['liveData']['linescore']['periods'][-1]['home']['shotsOnGoal']
-                away_sog = game['liveData']['linescore']['periods'][-1]['away']['shotsOnGoal']
-                Data = game['gameData']
-                print(Data['datetime']['dateTime'])
-                ID = self.data_extractor.build_game_ID(game_ID, year, season_type)
-                print("Game ID :", ID, " ; ", Data['teams']['home']['abbreviation']," (home) VS",Data['teams']['away']['abbreviation'],"(away) " )
+        game_index = self.data_extractor.get_game_index(year).set_index('gamePk')
+        max_game = int((game_index['type'] == 'R').sum())
+
+        season_type = IntSlider(min=2, max=3, value=2, description='type', continuous_update=False)
+        game_ID = IntSlider(min=1, max=max(max_game, 1), value=1, description='Game ID', continuous_update=False)
+        playoff_round = IntSlider(min=1, max=4, value=1, description='Round', continuous_update=False)
+        matchup = IntSlider(min=1, max=8, value=1, description='MatchUp', continuous_update=False)
+        games_num = IntSlider(min=1, max=7, value=1, description='game', continuous_update=False)
+        summary = widgets.Output()
+        play_browser = self.__create_play_browser()
+
+        def plot_game(change=None):
+            if season_type.value == 2:
+                ID = int(self.data_extractor.build_game_ID(game_ID.value, year, season_type.value))
+            else:
+                ID = year*10**6 + 3*10**4 + playoff_round.value*100 + matchup.value*10 + games_num.value
+
+            with summary:
+                summary.clear_output(wait=True)
+                if ID not in game_index.index:
+                    print('No such game')
+                    play_browser['show_game'](None)
+                    return
+                game_summary = game_index.loc[ID]
+                if game_summary['status'] in ('Scheduled (Time TBD)', 'Scheduled'):
+                    print('This game was not played ')
+                    play_browser['show_game'](None)
+                    return
+                print(game_summary['date'])
+                print("Game ID :", ID, " ; ", game_summary['homeTeamAbbreviation']," (home) VS",game_summary['awayTeamAbbreviation'],"(away) " )
                 print()
                 Dict = {}
-                Dict['teams'] = [game['gameData']['teams']['home']['abbreviation'], game['gameData']['teams']['away']['abbreviation']]
-                Dict['Goals'] = [home_goals,away_goals]
-                Dict['SoG'] = [home_sog,away_sog]
-                #Dict['SO Goals'] = [0,0]
-                #Dict['SO Attempts'] = [0,0]
+                Dict['teams'] = [game_summary['homeTeamAbbreviation'], game_summary['awayTeamAbbreviation']]
+                Dict['Goals'] = [game_summary['homeGoals'], game_summary['awayGoals']]
+                Dict['SoG'] = [game_summary['homeShotsOnGoal'], game_summary['awayShotsOnGoal']]
                 df = pd.DataFrame(Dict).T
                 df.columns = ['Home', 'Away']
                 print(df)
-                self.play_visualization(game)
-
-            if season_type == 3:
-                try:
-                    game = self.data_extractor.get_game3(year, season_type,playoff_round,matchup, games_num, entire_season)
-                    Data = game['gameData']
-
-                    if game['gameData']['status']['detailedState'] == 'Scheduled (Time TBD)' or game['gameData']['status']['detailedState'] == 'Scheduled' :
-                        print('This game was not played ')
-                    else : 
-                        home_goals = game['liveData']['linescore']['periods'][2]['home']['goals']
-                        away_goals =game['liveData']['linescore']['periods'][2]['away']['goals']
-                        home_sog = game['liveData']['linescore']['periods'][2]['home']['shotsOnGoal']
-                        away_sog = game['liveData']['linescore']['periods'][2]['away']['shotsOnGoal']
-                        print(Data['datetime']['dateTime'])
-                        ID = str(year) + "03" + str(playoff_round).zfill(2) + str(matchup) + str(games_num) 
-                        print("Game ID :", ID, " ; ", Data['teams']['home']['abbreviation']," (home) VS",Data['teams']['away']['abbreviation'],"(away) " )
-                        print()
-                        Dict = {}
-                        Dict['teams'] = [game['gameData']['teams']['home']['abbreviation'], game['gameData']['teams']['away']['abbreviation']]
-                        Dict['Goals'] = [home_goals, away_goals]
-                        Dict['SoG'] = [home_sog,away_sog]
-                        #Dict['SO Goals'] = [0,0]
-                        #Dict['SO Attempts'] = [0,0]
-                        df = pd.DataFrame(Dict).T
-                        df.columns = ['Home', 'Away']
-                        print(df)
-                        self.play_visualization(game)
-
-                except KeyError as e:
-                    print('No such game')
+            play_browser['show_game'](entire_season[str(ID)])
+
+        for slider in (season_type, game_ID, playoff_round, matchup, games_num):
+            slider.observe(plot_game, names='value')
+        plot_game()
+        display(widgets.VBox([season_type, game_ID, playoff_round, matchup, games_num, summary, play_browser['slider'], play_browser['view']]))
+
+
+    # one figure with the rink and one scatter artist for the coordinates of the play, updated in place when the play or the game changes
+    # with an interactive backend (%matplotlib widget) the canvas of the figure is shown directly, otherwise the figure is drawn again in an output
+    def __create_play_browser(self) -> dict:
+        rink = get_rink_image()
+        with plt.ioff():
+            fig, ax = plt.subplots()
+        ax.imshow(rink.full, extent=[ -100, 100, -55, 55])
+        scatter = ax.scatter([], [])
+        title = ax.set_title('')
+
+        slider = IntSlider(min=1, max=1, value=1, description='Play', continuous_update=True)
+        is_widget_canvas = isinstance(fig.canvas, widgets.DOMWidget)
+        view = fig.canvas if is_widget_canvas else widgets.Output()
+        plays = []
+
+        def plot_visualization_play(change=None):
+            play = plays[slider.value-1] if 0 < slider.value <= len(plays) else None
+            coord = play['coordinates'] if play is not None else {}
+            if 'x' in coord and 'y' in coord:
+                scatter.set_offsets([[coord['x'], coord['y']]])
+            else:
+                scatter.set_offsets(np.empty((0, 2)))
+            title.set_text(play['result']['description'] if play is not None else '')
+            if is_widget_canvas:
+                fig.canvas.draw_idle()
+            else:
+                with view:
+                    view.clear_output(wait=True)
+                    display(fig)
+
+        def show_game(game: dict):
+            plays[:] = game['liveData']['plays']['allPlays'] if game is not None else []
+            with slider.hold_trait_notifications():
+                slider.max = max(len(plays), 1)
+                slider.value = 1
+            plot_visualization_play()
+
+        slider.observe(plot_visualization_play, names='value')
+        return {'slider': slider, 'view': view, 'show_game': show_game}
@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional, TypedDict
+
+from src import JsonBackend
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# values of a game read by DataExtractor to build the game index and to keep the plays (see DataExtractor.__extract_game_row and
+# clean_single_game_json), the values read in the plays are given to FeedDecoder. -1 is any element of a list.
+GAME_PATHS = [
+    ('gamePk',),
+    ('gameData', 'game', 'type'),
+    ('gameData', 'datetime', 'dateTime'),
+    ('gameData', 'status', 'detailedState'),
+    ('gameData', 'teams', 'home', 'id'),
+    ('gameData', 'teams', 'home', 'abbreviation'),
+    ('gameData', 'teams', 'away', 'id'),
+    ('gameData', 'teams', 'away', 'abbreviation'),
+    ('liveData', 'linescore', 'periods', -1, 'periodType'),
+    ('liveData', 'linescore', 'periods', -1, 'home', 'rinkSide'),
+    ('liveData', 'linescore', 'hasShootout'),
+    ('liveData', 'linescore', 'teams', 'home', 'goals'),
+    ('liveData', 'linescore', 'teams', 'home', 'shotsOnGoal'),
+    ('liveData', 'linescore', 'teams', 'away', 'goals'),
+    ('liveData', 'linescore', 'teams', 'away', 'shotsOnGoal'),
+    ('liveData', 'plays', 'playsByPeriod', -1, 'plays'),
+]
+
+# values of the plays always read: the period and the time of the plays (time played in the last period) and their type (kept plays), the
+# other plays than the kept plays only have these values
+PLAY_PATHS = [
+    ('about', 'period'),
+    ('about', 'periodTime'),
+    ('result', 'eventTypeId'),
+]
+
+
+def build_path_tree(paths: list) -> dict:
+    """
+    Merge paths in a tree of dictionaries, a leaf is None. An int in a path is an element of a list, every element of a list has the same
+    tree. A path that ends in the middle of another path keeps the whole value.
+
+    Returns: The tree of the paths
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        for i, key in enumerate(path):
+            key = -1 if isinstance(key, int) else key
+            if key in node and node[key] is None:
+                break
+            if i == len(path) - 1:
+                node[key] = None
+            else:
+                node = node.setdefault(key, {})
+    return tree
+
+
+def build_schema(tree: dict, name: str = 'Game'):
+    """
+    Type of the json objects that have the values of the tree: a TypedDict with the keys of the tree, or a list if the keys are elements of a
+    list, both can be null. msgspec only decodes these keys, the other keys of the objects are skipped without building their values. A leaf
+    of the tree can be a type instead of None (any value).
+
+    Returns: The type of the tree
+    """
+    if tree is None:
+        return Any
+    if isinstance(tree, type):
+        return tree
+    if -1 in tree:
+        return Optional[List[build_schema(tree[-1], name + 'Item')]]
+    fields = {key: build_schema(subtree, name + key[:1].upper() + key[1:]) for key, subtree in tree.items()}
+    return Optional[TypedDict(name, fields, total=False)]
+
+
+class FeedDecoder:
+    def __init__(self, play_paths: list = None):
+        """
+        Decode the live feeds of the games keeping only the values used to build the dataframes (GAME_PATHS, and PLAY_PATHS and play_paths in
+        every play of liveData.plays.allPlays). The games are plain dictionaries with the same structure as the feeds, but the rosters, the
+        boxscores and the unused values of the plays are skipped while parsing and never built. Without msgspec, or if play_paths is None (the
+        values read in the plays are unknown), the whole feeds are parsed by JsonBackend.
+
+        Args:
+            play_paths: Paths of the values read in every play (see PLAY_COLUMNS of DataExtractor), None to keep every value
+        """
+        self.is_typed = msgspec is not None and play_paths is not None
+        self.__split_season = msgspec.json.Decoder(Dict[str, msgspec.Raw]) if msgspec is not None else None
+        if self.is_typed:
+            plays = [('liveData', 'plays', 'allPlays', -1) + tuple(path) for path in PLAY_PATHS + list(play_paths)]
+            self.__game_decoder = msgspec.json.Decoder(build_schema(build_path_tree(GAME_PATHS + plays)))
+
+            # the plays are kept as json by the first decoder, then only the plays of the kept types are decoded with all their values
+            tree = build_path_tree(GAME_PATHS)
+            tree['liveData']['plays']['allPlays'] = {-1: msgspec.Raw}
+            self.__raw_plays_decoder = msgspec.json.Decoder(build_schema(tree, 'RawGame'))
+            self.__play_header_decoder = msgspec.json.Decoder(build_schema(build_path_tree(PLAY_PATHS), 'PlayHeader'))
+            self.__play_decoder = msgspec.json.Decoder(build_schema(build_path_tree(PLAY_PATHS + list(play_paths)), 'Play'))
+
+
+    def decode_game(self, data: bytes, event_types: set = None) -> dict:
+        """
+        Decode the live feed of a game.
+
+        Args:
+            data: Json of the game
+            event_types: eventTypeId of the plays that have all the values of play_paths, the other plays only have the values of PLAY_PATHS
+                (every play has all the values if None)
+
+        Returns: The game
+        """
+        if not self.is_typed:
+            return JsonBackend.loads(data)
+        try:
+            return self.__decode_typed_game(data, event_types)
+        except msgspec.ValidationError:
+            #a value that doesn't have the type of the schema (a number instead of an object...), the whole game is parsed like without
+            #msgspec and the missing values get their default in DataExtractor
+            return JsonBackend.loads(data)
+
+
+    def __decode_typed_game(self, data: bytes, event_types: set) -> dict:
+        if event_types is None:
+            return self.__game_decoder.decode(data)
+
+        game = self.__raw_plays_decoder.decode(data)
+        plays = ((game or {}).get('liveData') or {}).get('plays') or {}
+        if plays.get('allPlays') is not None:
+            all_plays = []
+            for json_play in plays['allPlays']:
+                play = self.__play_header_decoder.decode(json_play)
+                is_kept = play is not None and (play.get('result') or {}).get('eventTypeId') in event_types
+                all_plays.append(self.__play_decoder.decode(json_play) if is_kept else play)
+            plays['allPlays'] = all_plays
+        return game
+
+
+    def iter_games(self, data: bytes, game_ids: list = None, event_types: set = None):
+        """
+        Decode the games of the json of a game file or of a season json file (dictionary of the games by id), one game at a time when msgspec
+        is installed.
+
+        Args:
+            data: Json of the file
+            game_ids: Ids of the games of the season to decode, every game if None
+            event_types: eventTypeId of the plays that have all their values (see decode_game)
+
+        Returns: Iterator over the games
+        """
+        if self.__split_season is None:
+            games = JsonBackend.loads(data)
+            if 'gamePk' in games:
+                yield games
+            else:
+                yield from (games[str(game_id)] for game_id in (games.keys() if game_ids is None else game_ids))
+            return
+        games = self.__split_season.decode(data)
+        if 'gamePk' in games:
+            yield self.decode_game(data, event_types)
+        else:
+            #the typed decoders read the json of the game in place, JsonBackend gets a copy (json and ujson only parse bytes and str)
+            for game_id in (games.keys() if game_ids is None else game_ids):
+                json_game = games[str(game_id)]
+                yield self.decode_game(memoryview(json_game) if self.is_typed else bytes(json_game), event_types)
@@ -0,0 +1,99 @@
+import os.path as path
+import requests
+from src import JsonBackend
+
+
+class GameIdPlanner:
+    def __init__(self, session: requests.Session = None, base_url: str = 'https://statsapi.web.nhl.com/api/v1', timeout: tuple = (5, 30),
+                 schedule_directory: str = None):
+        """
+        Build the exact list of the game ids of a season so the downloader doesn't have to probe game ids until it gets enough misses.
+
+        Args:
+            session: Session used to request the schedule, a new one is created if None
+            base_url: Root of the stats api
+            timeout: (connect, read) timeouts in seconds of the schedule request
+            schedule_directory: Directory of local schedules (schedule<year><year+1>.json, same format as the /schedule endpoint of the api).
+                When a season has a local schedule the api is not called.
+        """
+        self.session = session if session is not None else requests.Session()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.schedule_directory = schedule_directory
+
+
+    def plan_game_ids(self, year: int, manifest: dict = None) -> dict:
+        """
+        Build the game ids of a season from its schedule. If the schedule can't be found, the manifest of a season that is over is used instead.
+
+        Args:
+            year: The season
+            manifest: Manifest of the season (see StatsApiProxy), can be None
+
+        Returns: A dictionary with the sorted game ids of the regular season ('regular') and of the playoffs ('playoff'),
+            None if the game ids can't be known in advance and must be probed
+        """
+        schedule = self.__load_schedule(year)
+        if schedule is not None:
+            return self.__game_ids_from_schedule(schedule)
+        if manifest:
+            return self.__game_ids_from_manifest(manifest)
+        return None
+
+
+    def __load_schedule(self, year: int) -> dict:
+        """
+        Load the schedule of a season from the schedule directory, or from the api if the directory doesn't have it.
+
+        Args:
+            year: The season
+
+        Returns: The schedule (json of the /schedule endpoint), None if it couldn't be loaded
+        """
+        if self.schedule_directory is not None:
+            path_to_file = self.schedule_directory + f'/schedule{year}{year+1}.json'
+            if path.exists(path_to_file):
+                file = open(path_to_file, 'rb')
+                schedule = JsonBackend.loads(file.read())
+                file.close()
+                return schedule
+
+        try:
+            response = self.session.get(f'{self.base_url}/schedule', params={'season': f'{year}{year+1}', 'gameType': 'R,P'}, timeout=self.timeout)
+            if response.status_code != 200:
+                print(f'The schedule of season {year}-{year+1} could not be downloaded, return code was {response.status_code}')
+                return None
+            return JsonBackend.loads(response.content)
+        except (requests.RequestException, ValueError) as error:
+            print(f'The schedule of season {year}-{year+1} could not be downloaded')
+            print(error)
+            return None
+
+
+    def __game_ids_from_schedule(self, schedule: dict) -> dict:
+        game_ids = set()
+        for date in schedule.get('dates', []):
+            for game in date.get('games', []):
+                game_ids.add(int(game['gamePk']))
+        if len(game_ids) == 0:
+            return None
+        return self.__split_game_ids(game_ids)
+
+
+    def __game_ids_from_manifest(self, manifest: dict) -> dict:
+        """
+        A manifest only lists every game of a season once the season is over, that is when it has playoff games and all its games are final.
+        """
+        saved_games = {int(game_id): entry for game_id, entry in manifest.items() if entry.get('status') == 'ok'}
+        game_ids = self.__split_game_ids(saved_games)
+        if len(game_ids['playoff']) == 0 or any(entry.get('game_state') != 'Final' for entry in saved_games.values()):
+            return None
+        return game_ids
+
+
+    def __split_game_ids(self, game_ids) -> dict:
+        #The type of the game is the 5th and 6th digits of the game id, 02 for the regular season and 03 for the playoffs
+        return {
+            'regular': sorted(game_id for game_id in game_ids if str(game_id)[4:6] == '02'),
+            'playoff': sorted(game_id for game_id in game_ids if str(game_id)[4:6] == '03'),
+        }
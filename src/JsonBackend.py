@@ -0,0 +1,94 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+#backends in order of preference, the first one installed is used by default
+BACKENDS = ['orjson', 'msgspec', 'ujson', 'json']
+
+
+def get_available_backends() -> list:
+    modules = {'orjson': orjson, 'msgspec': msgspec, 'ujson': ujson, 'json': json}
+    return [name for name in BACKENDS if modules[name] is not None]
+
+
+class JsonBackend:
+    def __init__(self, name: str = None):
+        """
+        Parse and serialize json with the fastest library installed (orjson, msgspec or ujson), or with the json module of the standard library.
+        The json is parsed directly from bytes (str, bytearray and memoryview are accepted too, ujson and json copy the last two to bytes) and
+        serialized to bytes, so the feeds read from the disk or the network are never decoded to str first.
+
+        Args:
+            name: Name of the backend (see BACKENDS), the first one installed if None
+        """
+        available = get_available_backends()
+        name = available[0] if name is None else name
+        if name not in available:
+            raise ImportError(f'The json backend {name} is not installed (installed: {", ".join(available)})')
+        self.name = name
+
+        if name == 'orjson':
+            self.loads = orjson.loads
+            self.__dumps = lambda obj, indent, sort_keys: orjson.dumps(
+                obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+        elif name == 'msgspec':
+            decoder = msgspec.json.Decoder()
+            encoder = msgspec.json.Encoder(order='sorted')
+            self.loads = decoder.decode
+            self.__dumps = lambda obj, indent, sort_keys: msgspec.json.format(
+                encoder.encode(obj) if sort_keys else msgspec.json.encode(obj), indent=2 if indent else 0)
+        elif name == 'ujson':
+            self.loads = lambda data: ujson.loads(data if isinstance(data, (bytes, str)) else bytes(data))
+            self.__dumps = lambda obj, indent, sort_keys: ujson.dumps(obj, indent=2 if indent else 0, sort_keys=sort_keys).encode('utf-8')
+        else:
+            self.loads = lambda data: json.loads(data if isinstance(data, (bytes, str)) else bytes(data))
+            self.__dumps = lambda obj, indent, sort_keys: json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys).encode('utf-8')
+
+
+    def dumps(self, obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+        """
+        Returns: The json of obj, in utf-8
+        """
+        return self.__dumps(obj, indent, sort_keys)
+
+
+json_backend = JsonBackend()
+
+
+def set_json_backend(name: str = None) -> JsonBackend:
+    """
+    Change the backend used by loads and dumps, and so by the whole project.
+
+    Args:
+        name: Name of the backend (see BACKENDS), the first one installed if None
+    """
+    global json_backend
+    json_backend = JsonBackend(name)
+    return json_backend
+
+
+def loads(data):
+    """
+    Parse json (bytes, bytearray, memoryview or str) with the current backend.
+    """
+    return json_backend.loads(data)
+
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize obj to json (bytes) with the current backend.
+    """
+    return json_backend.dumps(obj, indent, sort_keys)
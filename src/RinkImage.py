@@ -0,0 +1,74 @@
+import os.path as path
+from functools import lru_cache
+
+import numpy as np
+import matplotlib.image as mpimg
+
+DEFAULT_RINK_IMAGE = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'figures', 'nhl_rink.png')
+
+#size of the rink in feet, the coordinates of the plays go from -100 to 100 (x) and from -42.5 to 42.5 (y)
+RINK_LENGTH = 200.0
+RINK_WIDTH = 85.0
+
+
+class RinkImage:
+    def __init__(self, path_to_image: str = DEFAULT_RINK_IMAGE):
+        """
+        Image of the rink, read from the disk once. The image of the full rink and of the offensive half of the rink (x >= 0) are kept as
+        read-only arrays and the coordinates of the plays are converted to pixels on whole arrays. Use get_rink_image to share the image
+        between the plots instead of reading it for every plot.
+
+        Args:
+            path_to_image: Path of the image of the full rink
+        """
+        self.full = mpimg.imread(path_to_image)
+        self.full.setflags(write=False)
+        self.half = self.full[:, self.full.shape[1] // 2:]
+        self.height, self.width = self.full.shape[:2]
+        self.half_width = self.half.shape[1]
+
+        self.full_extent = [-RINK_LENGTH / 2, RINK_LENGTH / 2, -RINK_WIDTH / 2, RINK_WIDTH / 2]
+        self.half_extent = [0, RINK_LENGTH / 2, -RINK_WIDTH / 2, RINK_WIDTH / 2]
+        self.pil_images = {}
+
+
+    def to_pil(self, half: bool = False):
+        """
+        Returns: The image of the full rink or of the half rink as a PIL image (for the layout images of plotly), converted only once
+        """
+        if half not in self.pil_images:
+            from PIL import Image
+            image = self.half if half else self.full
+            if image.dtype != np.uint8:
+                image = (image * 255).round().astype(np.uint8)
+            self.pil_images[half] = Image.fromarray(np.ascontiguousarray(image))
+        return self.pil_images[half]
+
+
+    def to_pixels(self, x, y, half: bool = False) -> (np.ndarray, np.ndarray):
+        """
+        Convert coordinates of the rink (in feet) to pixels of the image, with the origin at the bottom left corner of the image.
+
+        Args:
+            x: x coordinates of the plays (array or scalar)
+            y: y coordinates of the plays (array or scalar)
+            half: If True the pixels are the pixels of the half rink image, the plays of the defensive half are folded on the offensive half (|x|)
+
+        Returns: The x and y pixels of the plays
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if half:
+            pixels_x = np.abs(x) * (self.half_width / (RINK_LENGTH / 2))
+        else:
+            pixels_x = (x + RINK_LENGTH / 2) * (self.width / RINK_LENGTH)
+        pixels_y = (y + RINK_WIDTH / 2) * (self.height / RINK_WIDTH)
+        return pixels_x, pixels_y
+
+
+@lru_cache(maxsize=None)
+def get_rink_image(path_to_image: str = DEFAULT_RINK_IMAGE) -> RinkImage:
+    """
+    Returns: The image of the rink of path_to_image, read only the first time it is asked
+    """
+    return RinkImage(path_to_image)
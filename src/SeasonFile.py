@@ -0,0 +1,421 @@
+import os
+import os.path as path
+import mmap
+import struct
+import hashlib
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from src import JsonBackend
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+#A season file starts with MAGIC, followed by one record per game and ends with the index of the records and the footer:
+#   MAGIC | [dictionary record] | record | record | ... | index (json) | footer
+#   record : game id (int64) | length of the data (uint32) | codec (uint8) | json of the game as returned by the api, compressed with the codec
+#   footer : offset of the index (uint64) | INDEX_MAGIC
+#The index maps every game id to the offset, the length and the codec of the data of the game, so a game can be read without reading the others.
+#It also keeps some metadata of the games (the teams), so the games can be selected without reading them. When the games are compressed with a
+#zstd dictionary, the dictionary is saved in a record with game id 0 and its offset is in the index. It is the first record, unless the games
+#before it were recovered from an interrupted file without dictionary.
+MAGIC = b'NHLGAMES'
+INDEX_MAGIC = b'NHLINDEX'
+RECORD_HEADER = struct.Struct('<qIB')
+FOOTER = struct.Struct('<Q8s')
+VERSION = 2
+DICTIONARY_GAME_ID = 0
+
+CODECS = {'none': 0, 'gzip': 1, 'zstd': 2, 'zstd-dictionary': 3}
+DEFAULT_COMPRESSION_LEVELS = {'none': 0, 'gzip': 6, 'zstd': 10}
+
+
+def is_season_file(path_to_file: str) -> bool:
+    """
+    Tells if a file is a season file (as written by SeasonFileWriter) rather than a json file.
+    """
+    with open(path_to_file, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def is_gzip_file(path_to_file: str) -> bool:
+    with open(path_to_file, 'rb') as file:
+        return file.read(2) == b'\x1f\x8b'
+
+
+def train_compression_dictionary(json_games: list, dictionary_size: int = 112640) -> bytes:
+    """
+    Train a zstd dictionary on some games. The games of a season share most of their keys and structure, a dictionary trained on a few
+    hundred games of a season improves the compression of every game of this season and of the next ones.
+
+    Args:
+        json_games: The json (str or bytes) of the games used for the training
+        dictionary_size: Maximum size in bytes of the dictionary
+
+    Returns: The dictionary, to be given to SeasonFileWriter
+    """
+    if zstandard is None:
+        raise ImportError('zstandard must be installed to train a compression dictionary (pip install zstandard)')
+    samples = [json_game.encode('utf-8') if isinstance(json_game, str) else json_game for json_game in json_games]
+    return zstandard.train_dictionary(dictionary_size, samples).as_bytes()
+
+
+class SeasonFileWriter:
+    def __init__(self, path_to_file: str, resume: bool = True, compression: str = 'gzip', compression_level: int = None,
+                 compression_dictionary: bytes = None):
+        """
+        Write the games of a season one after another in a season file. The games are written in a temporary file (<path_to_file>.partial)
+        as soon as they are added and the temporary file replaces the season file when the writer is closed, so the season file is never
+        partially written. If the download is interrupted, the games of the temporary file are recovered by the next writer.
+
+        Args:
+            path_to_file: Path of the season file
+            resume: True to keep the games of a temporary file left by an interrupted writer, False to start over
+            compression: 'none', 'gzip' or 'zstd' (zstandard must be installed), every game is compressed on its own
+            compression_level: Level of the compression, the default level of the codec if None
+            compression_dictionary: zstd dictionary used to compress the games (see train_compression_dictionary), only with 'zstd'
+        """
+        if compression not in DEFAULT_COMPRESSION_LEVELS:
+            raise ValueError(f"'compression' must be one of {list(DEFAULT_COMPRESSION_LEVELS)}")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError('zstandard must be installed to use the zstd compression (pip install zstandard)')
+        if compression_dictionary is not None and compression != 'zstd':
+            raise ValueError("A compression dictionary can only be used with the 'zstd' compression")
+
+        self.path_to_file = path_to_file
+        self.path_to_partial_file = path_to_file + '.partial'
+        self.compression = compression
+        self.compression_level = compression_level if compression_level is not None else DEFAULT_COMPRESSION_LEVELS[compression]
+        self.dictionary = compression_dictionary
+        self.dictionary_offset = None
+        self.index = {}
+        self.metadata = {}
+
+        if resume and path.exists(self.path_to_partial_file):
+            self.file = open(self.path_to_partial_file, 'r+b')
+            self.__recover_partial_file()
+        else:
+            self.file = open(self.path_to_partial_file, 'wb')
+            self.__start_file()
+
+        self.dictionary_id = hashlib.sha256(self.dictionary).hexdigest() if self.dictionary is not None else None
+        if compression == 'zstd':
+            zstd_dictionary = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary is not None else None
+            self.compressor = zstandard.ZstdCompressor(level=self.compression_level, dict_data=zstd_dictionary)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            #Keep the temporary file so the games already downloaded are recovered next time
+            self.file.close()
+
+
+    def __contains__(self, game_id) -> bool:
+        return int(game_id) in self.index
+
+
+    def add_game(self, game_id: int, json_game, metadata: dict = None):
+        """
+        Append the json of a game to the season file. The json is compressed as is, it is never parsed. If the game was already added,
+        the new json replaces the old one.
+
+        Args:
+            game_id: Game id of the game
+            json_game: The json of the game as returned by the api (str or bytes)
+            metadata: Information about the game saved in the index (must be serializable in json)
+        """
+        data = json_game.encode('utf-8') if isinstance(json_game, str) else json_game
+        if self.compression == 'gzip':
+            codec, data = CODECS['gzip'], zlib.compress(data, self.compression_level)
+        elif self.compression == 'zstd':
+            codec, data = CODECS['zstd-dictionary' if self.dictionary is not None else 'zstd'], self.compressor.compress(data)
+        else:
+            codec = CODECS['none']
+        self.__write_record(game_id, codec, data, metadata)
+
+
+    def copy_game(self, season_file, game_id: int):
+        """
+        Copy a game of another season file. The compressed data is copied as is unless it needs a dictionary that this file doesn't have.
+
+        Args:
+            season_file: SeasonFileReader of the other season file
+            game_id: Game id of the game
+        """
+        codec, data = season_file.get_game_record(game_id)
+        if codec == CODECS['zstd-dictionary'] and season_file.dictionary_id != self.dictionary_id:
+            self.add_game(game_id, season_file.decompress(codec, data), season_file.get_game_metadata(game_id))
+        else:
+            self.__write_record(game_id, codec, data, season_file.get_game_metadata(game_id))
+
+
+    def close(self):
+        """
+        Write the index at the end of the file and replace the season file with the temporary file.
+        """
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        index = {
+            'version': VERSION,
+            'games': {str(game_id): list(position) for game_id, position in sorted(self.index.items())},
+            'metadata': {str(game_id): metadata for game_id, metadata in sorted(self.metadata.items())},
+        }
+        if self.dictionary is not None:
+            index['dictionary'] = [self.dictionary_offset, len(self.dictionary)]
+        self.file.write(JsonBackend.dumps(index))
+        self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.path_to_partial_file, self.path_to_file)
+
+
+    def discard(self):
+        """
+        Close the writer without replacing the season file, the temporary file is deleted.
+        """
+        self.file.close()
+        os.remove(self.path_to_partial_file)
+
+
+    def __write_record(self, game_id: int, codec: int, data: bytes, metadata: dict):
+        self.file.write(RECORD_HEADER.pack(int(game_id), len(data), codec))
+        self.index[int(game_id)] = (self.file.tell(), len(data), codec)
+        self.file.write(data)
+        self.file.flush()
+        if metadata is not None:
+            self.metadata[int(game_id)] = metadata
+        else:
+            self.metadata.pop(int(game_id), None)
+
+
+    def __start_file(self):
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(MAGIC)
+        self.dictionary_offset = None
+        if self.dictionary is not None:
+            self.__write_dictionary()
+        self.file.flush()
+
+
+    def __write_dictionary(self):
+        self.file.write(RECORD_HEADER.pack(DICTIONARY_GAME_ID, len(self.dictionary), CODECS['none']))
+        self.dictionary_offset = self.file.tell()
+        self.file.write(self.dictionary)
+        self.file.flush()
+
+
+    def __recover_partial_file(self):
+        """
+        Rebuild the index of a temporary file left by an interrupted writer. The records are read one after another and the file is truncated
+        after the last complete record. The file is started over if it was compressed with another dictionary. If the file has no dictionary
+        and this writer has one, the dictionary is written after the recovered games (they keep their codec).
+        """
+        size = os.fstat(self.file.fileno()).st_size
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.__start_file()
+            return
+
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= size:
+            game_id, length, codec = RECORD_HEADER.unpack(self.file.read(RECORD_HEADER.size))
+            if offset + RECORD_HEADER.size + length > size:
+                break
+            if game_id == DICTIONARY_GAME_ID:
+                dictionary = self.file.read(length)
+                if (self.dictionary is not None and dictionary != self.dictionary) or self.compression != 'zstd':
+                    print(f'{self.path_to_partial_file} was compressed with another dictionary, it is started over')
+                    self.index = {}
+                    self.__start_file()
+                    return
+                self.dictionary = dictionary
+                self.dictionary_offset = offset + RECORD_HEADER.size
+            else:
+                self.index[game_id] = (offset + RECORD_HEADER.size, length, codec)
+            offset += RECORD_HEADER.size + length
+            self.file.seek(offset)
+        self.file.seek(offset)
+        self.file.truncate()
+        if self.dictionary is not None and self.dictionary_offset is None:
+            self.__write_dictionary()
+        print(f'{len(self.index)} games recovered from {self.path_to_partial_file}')
+
+
+class SeasonFileReader:
+    def __init__(self, path_to_file: str):
+        """
+        Read the games of a season file written by SeasonFileWriter. The file is memory-mapped, only the index is read when the file is opened
+        and the games are read and decompressed when they are accessed.
+
+        Args:
+            path_to_file: Path of the season file
+        """
+        self.path_to_file = path_to_file
+        self.file = open(path_to_file, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_offset, index_magic = FOOTER.unpack(self.buffer[-FOOTER.size:])
+        if index_magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f'{path_to_file} is not a complete season file')
+        index = JsonBackend.loads(self.buffer[index_offset:len(self.buffer) - FOOTER.size])
+        #the codec is missing from the index of the files written before the compression was added
+        self.index = {int(game_id): (position[0], position[1], position[2] if len(position) > 2 else CODECS['none'])
+                      for game_id, position in index['games'].items()}
+        self.metadata = {int(game_id): metadata for game_id, metadata in index.get('metadata', {}).items()}
+
+        self.dictionary = None
+        self.dictionary_id = None
+        if 'dictionary' in index:
+            offset, length = index['dictionary']
+            self.dictionary = self.buffer[offset:offset + length]
+            self.dictionary_id = hashlib.sha256(self.dictionary).hexdigest()
+        self.decompressors = {}
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def __contains__(self, game_id) -> bool:
+        return int(game_id) in self.index
+
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+    def game_ids(self) -> list:
+        return sorted(self.index)
+
+
+    def get_game_record(self, game_id: int) -> (int, bytes):
+        """
+        Returns: The codec and the data of a game as they were written, without decompressing it
+        """
+        offset, length, codec = self.index[int(game_id)]
+        return codec, self.buffer[offset:offset + length]
+
+
+    def get_game_bytes(self, game_id: int) -> bytes:
+        """
+        Returns: The json of a game as it was downloaded, without parsing it
+        """
+        codec, data = self.get_game_record(game_id)
+        return self.decompress(codec, data)
+
+
+    def decompress(self, codec: int, data: bytes) -> bytes:
+        if codec == CODECS['none']:
+            return data
+        if codec == CODECS['gzip']:
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise ImportError(f'zstandard must be installed to read {self.path_to_file} (pip install zstandard)')
+        if codec not in self.decompressors:
+            zstd_dictionary = zstandard.ZstdCompressionDict(self.dictionary) if codec == CODECS['zstd-dictionary'] else None
+            self.decompressors[codec] = zstandard.ZstdDecompressor(dict_data=zstd_dictionary)
+        return self.decompressors[codec].decompress(data)
+
+
+    def get_game_metadata(self, game_id: int) -> dict:
+        """
+        Returns: The metadata saved with the game, None if there is none
+        """
+        return self.metadata.get(int(game_id))
+
+
+    def get_game(self, game_id: int) -> dict:
+        return JsonBackend.loads(self.get_game_bytes(game_id))
+
+
+    def iter_games(self):
+        """
+        Returns: A generator of (game_id, game) in the order of the game ids
+        """
+        for game_id in self.game_ids():
+            yield game_id, self.get_game(game_id)
+
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+class LazySeason(Mapping):
+    def __init__(self, path_to_file: str, cache_size: int = 8):
+        """
+        Read-only dictionary of the games of a season file, where the key is the game id (str, like the season json files, or int) and the value
+        the game. Opening a season only reads the index of the file, a game is parsed when it is accessed and the last parsed games are kept in a
+        small cache, so looking up the plays of the same game again and again doesn't parse it every time.
+
+        Args:
+            path_to_file: Path of the season file
+            cache_size: Number of parsed games kept in memory
+        """
+        self.season_file = SeasonFileReader(path_to_file)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def __getitem__(self, game_id) -> dict:
+        try:
+            game_id = int(game_id)
+        except (TypeError, ValueError):
+            raise KeyError(game_id)
+        if game_id in self.cache:
+            self.cache.move_to_end(game_id)
+            return self.cache[game_id]
+        if game_id not in self.season_file:
+            raise KeyError(str(game_id))
+
+        game = self.season_file.get_game(game_id)
+        self.cache[game_id] = game
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return game
+
+
+    def __contains__(self, game_id) -> bool:
+        try:
+            return int(game_id) in self.season_file
+        except (TypeError, ValueError):
+            return False
+
+
+    def __iter__(self):
+        return (str(game_id) for game_id in self.season_file.game_ids())
+
+
+    def __len__(self) -> int:
+        return len(self.season_file)
+
+
+    def get_game_metadata(self, game_id) -> dict:
+        return self.season_file.get_game_metadata(game_id)
+
+
+    def close(self):
+        self.cache.clear()
+        self.season_file.close()
@@ -2,12 +2,61 @@ import pandas as pd
 import requests
 import os
 import os.path as path
-import json
+import hashlib
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+from requests.adapters import HTTPAdapter
+from src import JsonBackend
+from src.GameIdPlanner import GameIdPlanner
+from src.SeasonFile import SeasonFileReader, SeasonFileWriter
+
+#Status codes for which the api is asked again, they do not mean that the game doesn't exist
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
 
 class StatsApiProxy:
-    def __init__(self):
-        pass
+    def __init__(self, max_workers: int = 8, base_url: str = 'https://statsapi.web.nhl.com/api/v1', timeout: tuple = (5, 30),
+                 max_retries: int = 4, backoff_factor: float = 0.5, backoff_max: float = 30, use_schedule: bool = True,
+                 schedule_directory: str = None, compression: str = 'gzip', compression_level: int = None, compression_dictionary: bytes = None):
+        """
+
+        Args:
+            max_workers: Maximum number of games downloaded at the same time. Use 1 to download the games one after another.
+            base_url: Root of the stats api, can be changed to point to a local server.
+            timeout: (connect, read) timeouts in seconds of every request
+            max_retries: Number of times a request is retried after a transport error, a 429 or a 5xx
+            backoff_factor: The n-th retry waits a random time between 0 and backoff_factor * 2**n seconds
+            backoff_max: Maximum time in seconds to wait before a retry
+            use_schedule: If True, only the game ids of the schedule of the season are requested. The game ids are probed when the
+                schedule is not available or if False.
+            schedule_directory: Directory of local schedules (schedule<year><year+1>.json) used instead of the api, see GameIdPlanner
+            compression: Compression of the games in the season files, 'none', 'gzip' or 'zstd' (zstandard must be installed)
+            compression_level: Level of the compression, the default level of the codec if None
+            compression_dictionary: zstd dictionary shared by the games of the season files, see SeasonFile.train_compression_dictionary
+        """
+        self.max_workers = max(1, max_workers)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+
+        #A single keep-alive session shared by all the workers, the pool is big enough to keep one connection per worker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.use_schedule = use_schedule
+        self.planner = GameIdPlanner(self.session, self.base_url, self.timeout, schedule_directory)
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_dictionary = compression_dictionary
     
     
     def get_player_stats(self, year: int, player_type: str) -> pd.DataFrame:
@@ -49,12 +98,12 @@ class StatsApiProxy:
         return df
 
     
-    def fetch_live_data_for_years(self, years_to_fetch: list, path_to_directory: str, override: bool):
-        self.__data_pipeline(years_to_fetch, path_to_directory, override)
+    def fetch_live_data_for_years(self, years_to_fetch: list, path_to_directory: str, override: bool, incremental: bool = False):
+        self.__data_pipeline(years_to_fetch, path_to_directory, override, incremental)
         return
         
         
-    def __data_pipeline(self, years_to_fetch: list, path_to_directory: str, override: bool):
+    def __data_pipeline(self, years_to_fetch: list, path_to_directory: str, override: bool, incremental: bool = False):
         """
         Allows one to dowload multiple season be entering a list which contains all the years that is needed to be dowloaded. This will call __dowload_games_for_season.
 
@@ -62,112 +111,377 @@ class StatsApiProxy:
             years_to_fetch: A list contains every year we wish to dowload
             path_to_directory: The path where all the files will be dowloaded
             override: If we wish to recreate new files if they already exist (make a new api call if override = True)
+            incremental: If True, the seasons are synchronized with the api even if the directory exists. Only the games that are missing,
+                failed or not final in the manifest of the season are requested, which also allows to resume an interrupted download.
 
         Returns: None
 
         """
-        if path.exists(path_to_directory):
+        if path.exists(path_to_directory) and not incremental:
             print('File already exists, no download required!')
         else:
             for year in years_to_fetch:
-                self.__download_games_for_season(year, path_to_directory, override)
+                self.__download_games_for_season(year, path_to_directory, override, incremental)
                 
         return
     
     
-    def __download_games_for_season(self, year: int, path_to_directory: str, override: bool):
+    def __download_games_for_season(self, year: int, path_to_directory: str, override: bool, incremental: bool = False):
         """
         Dowload all the games of a season to be save in a file structure that allows the easily find a game we want of fetch all the game of a season.
         This will create the following structure :
-        /path/to/directory/Season<year><year+1>/Regular
-                                                Playoff
-                                                season<year><year+1>.json
-        The regular and Playoff directory will each contains a multitude of files where the name of the file is its own gameid and the content of the file
-        is the response from the api (unless it returned a 404). The season<year><year+1>.json is a singular file that contains all the games from one season.
-        It's structure is a dictionary where the key is the gameid and the value the response from the api.
+        /path/to/directory/Season<year><year+1>/season<year><year+1>.games
+                                                manifest<year><year+1>.json
+        The season<year><year+1>.games is a singular file that contains all the games from one season (the response from the api), every game is appended
+        to it as soon as it is downloaded and it has an index of the games at the end so a single game can be read without reading the others (see SeasonFile).
+        The games are compressed one by one (gzip by default). It is written in a temporary file that replaces the season file at the end of the download. The manifest<year><year+1>.json keeps for every
+        game id that was requested its status, the ETag/Last-Modified of the response, the hash of the content, the state of the game and the fetch time.
 
         Args:
             year: The season to be dowloaded
             path_to_directory: Path where the files will be saved
             override: If one will like to override the file in the directory.
+            incremental: If True, only the games that are missing, failed or not final in the manifest are requested.
         """
 
         try:
             print(f'Starting process to dowload all data for season {year}-{year+1}')
-            #This is used to know when we reached the end of the games. The threshold can be changed if a lot of data is missing.
+
+            #build the directory path for the season
+            self.__check_for_directory_existence(path_to_directory + f'/Season{year}{year+1}')
+
+            path_to_manifest = path_to_directory + f'/Season{year}{year+1}/manifest{year}{year+1}.json'
+            path_to_season_file = path_to_directory + f'/Season{year}{year+1}/season{year}{year+1}.games'
+            #The games of the season file written by the last download are kept unless they are downloaded again
+            previous_season_file = SeasonFileReader(path_to_season_file) if path.exists(path_to_season_file) else None
+            #An interrupted download is only resumed in incremental mode
+            season_file = SeasonFileWriter(path_to_season_file, resume=incremental, compression=self.compression,
+                                           compression_level=self.compression_level, compression_dictionary=self.compression_dictionary)
+            season = {
+                'path_to_directory': path_to_directory,
+                'path_to_manifest': path_to_manifest,
+                'previous_season_file': previous_season_file,
+                'season_file': season_file,
+                #The games recovered from an interrupted download that are not in the last season file are changes
+                'season_changed': previous_season_file is not None and any(game_id not in previous_season_file for game_id in season_file.index),
+                'manifest': self.__load_manifest(path_to_manifest),
+                'override': override,
+                'incremental': incremental,
+                #Games for which the api could not be reached, they are not counted as missing games
+                'failed_game_ids': [],
+                'nb_of_changes': 0,
+            }
+
+            planned_game_ids = self.planner.plan_game_ids(year, season['manifest']) if self.use_schedule else None
+
+            try:
+                #If the download is stopped, the temporary season file is kept (see SeasonFileWriter.__exit__)
+                with season_file:
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        if planned_game_ids is not None:
+                            #The game ids are known, every one of them is requested and there is no need to detect the end of the season
+                            print(f'{len(planned_game_ids["regular"])} regular season games and {len(planned_game_ids["playoff"])} playoff games planned for season {year}-{year+1}')
+                            downloads = self.__download_games_in_order(executor, season, planned_game_ids['regular'] + planned_game_ids['playoff'])
+                            for game_id, play_by_play, status_code, validators in downloads:
+                                self.__save_game(season, game_id, play_by_play, status_code, validators)
+                        else:
+                            self.__probe_games_for_season(executor, season, year)
+                    self.__close_season_file(season)
+            except Exception:
+                if previous_season_file is not None:
+                    previous_season_file.close()
+                raise
+            finally:
+                #The manifest is saved even if the download is stopped so it can be resumed with incremental=True
+                self.__save_manifest(path_to_manifest, season['manifest'])
+            if len(season['failed_game_ids']) > 0:
+                print(f'The download failed for the games {season["failed_game_ids"]}, run the download again to fetch them')
+        
+        except Exception as error:
+            print(error)
+
+
+    def __probe_games_for_season(self, executor: ThreadPoolExecutor, season: dict, year: int):
+        """
+        Find the games of a season by requesting the game ids one after another until the end of the season, used when the game ids
+        can't be planned from a schedule.
+
+        Args:
+            executor: Thread pool used to run the requests
+            season: State of the season being downloaded (see __download_games_for_season)
+            year: The season to be dowloaded
+        """
+        #This is used to know when we reached the end of the games. The threshold can be changed if a lot of data is missing.
+        nb_of_miss = 0
+        threshold_of_miss = 5
+        #The games that failed are not misses, the download is stopped when threshold_of_miss games in a row failed (the api is down)
+        nb_of_failed_in_row = 0
+
+        #Define variable for the bestOf and the number of rounds of the playoffs
+        best_of_in_playoff = 7
+        nb_of_playoff_rounds = 4
+
+        #Get all the games for the regular season. The game ids are requested in order while keeping max_workers requests in flight,
+        #the results are consumed in the same order so the consecutive miss count is the same as a sequential download.
+        print(f'Regular season{year}-{year+1} :')
+        downloads = self.__download_games_in_order(executor, season, count(self.__build_game_id(year, True)))
+        for game_id, play_by_play, status_code, validators in downloads:
+            outcome = self.__save_game(season, game_id, play_by_play, status_code, validators)
+            if outcome == 'hit':
+                nb_of_miss = 0
+                nb_of_failed_in_row = 0
+            elif outcome == 'miss':
+                nb_of_miss += 1
+            else:
+                nb_of_failed_in_row += 1
+            if nb_of_miss >= threshold_of_miss or nb_of_failed_in_row >= threshold_of_miss:
+                break
+        downloads.close()
+        self.__check_failed_in_row(season, year, nb_of_failed_in_row, threshold_of_miss)
+
+        #Get all the games for the playoffs. Every matchup of a round is probed game by game, the round is over
+        #when a whole matchup is missing and the playoffs are over when a round (after the first one) has no game.
+        print(f'Playoff season{year}-{year + 1} :')
+        for playoff_round in range(1, nb_of_playoff_rounds + 1):
+            game_ids = (self.__build_playoff_game_id(year, playoff_round, matchup, game)
+                        for matchup in range(1, 10) for game in range(1, best_of_in_playoff + 1))
+            downloads = self.__download_games_in_order(executor, season, game_ids)
+            nb_of_game_in_round = 0
             nb_of_miss = 0
-            threshold_of_miss = 5
+            for game_id, play_by_play, status_code, validators in downloads:
+                outcome = self.__save_game(season, game_id, play_by_play, status_code, validators)
+                if outcome == 'hit':
+                    nb_of_game_in_round += 1
+                    nb_of_failed_in_row = 0
+                elif outcome == 'miss':
+                    nb_of_miss += 1
+                else:
+                    #A game that failed is not a miss, it is requested again by the next download
+                    nb_of_failed_in_row += 1
+                    if nb_of_failed_in_row >= threshold_of_miss:
+                        break
+                if game_id % 10 == best_of_in_playoff:
+                    if nb_of_miss == best_of_in_playoff:
+                        break
+                    nb_of_miss = 0
+            downloads.close()
+            self.__check_failed_in_row(season, year, nb_of_failed_in_row, threshold_of_miss)
+            if nb_of_game_in_round == 0 and playoff_round > 1:
+                break
 
-            #build gameID for regular season
-            game_id = self.__build_game_id(year, True)
 
-            #Define variable for the bestOf
-            best_of_in_playoff = 7
+    def __check_failed_in_row(self, season: dict, year: int, nb_of_failed_in_row: int, threshold_of_miss: int):
+        """
+        Stop the download of a season when the api could not be reached for threshold_of_miss games in a row, the end of the season
+        can't be detected without answers from the api.
 
-            #These two could be combined with time
-            #build the directory path for regular season
-            self.__check_for_directory_existence(path_to_directory+f'/Season{year}{year+1}'+f'/Regular{year}{year+1}')
-            #build the directory path for playoff season
-            self.__check_for_directory_existence(path_to_directory + f'/Season{year}{year + 1}' + f'/Playoff{year}{year + 1}') 
+        Args:
+            season: State of the season being downloaded (see __download_games_for_season)
+            year: The season being dowloaded
+            nb_of_failed_in_row: Number of games that failed since the last game found
+            threshold_of_miss: Number of games that failed in a row that stops the download
+        """
+        if nb_of_failed_in_row >= threshold_of_miss:
+            raise RuntimeError(f'The download of season {year}-{year+1} is stopped, the api could not be reached for {nb_of_failed_in_row} games '
+                               f'in a row (failed games: {season["failed_game_ids"]}), run the download again with incremental=True to resume it')
 
-            season_dict = None
 
-            #Get all the games for the regular season
-            print(f'Regular season{year}-{year+1} :')
-            while(nb_of_miss < threshold_of_miss):
-                print(f'--GAMEID {game_id}')
+    def __download_games_in_order(self, executor: ThreadPoolExecutor, season: dict, game_ids):
+        """
+        Download the games of game_ids concurrently while yielding the results in the same order as the ids. At most max_workers
+        requests are in flight, a new one is submitted every time a result is consumed. Closing the generator cancels the requests
+        that were not started yet, so the caller can stop as soon as it reached the end of the season.
 
-                #Build the path to file using the gameID as the name and adding a sub directory for regular season
-                path_to_file = path_to_directory+f'/Season{year}{year+1}'+f'/Regular{year}{year+1}'+f'/{game_id}.json'
-                print(f'--Data will be saved at {path_to_file}')
+        Args:
+            executor: Thread pool used to run the requests
+            season: State of the season being downloaded (see __download_games_for_season)
+            game_ids: Iterable (possibly infinite) of the game ids to download
 
-                play_by_play, status_code = self.__download_play_by_play_for_game_id(game_id)
-                if status_code == 200:
-                    self.__json_to_separate_file(play_by_play, path_to_file, override)
-                    season_dict = self.__json_to_single_file(play_by_play, game_id, season_dict, path_to_directory+f'/Season{year}{year+1}/season{year}{year+1}.json', override, False)
-                    nb_of_miss = 0
-                else:
-                    nb_of_miss += 1
-                game_id += 1
-
-            #Get all the games for the playoffs
-            nb_of_matchup = 0
-            was_last_round = False
-            game_id = self.__build_game_id(year, False)
-            print(f'Playoff season{year}-{year + 1} :')
-            
-            while True:
-                nb_of_miss = 0
-                for game in range(best_of_in_playoff):
-                    print(f'--GAMEID {game_id}')
-
-                    # Build the path to file using the gameID as the name and adding a sub directory for playoffs
-                    path_to_file = path_to_directory + f'/Season{year}{year + 1}' + f'/Playoff{year}{year + 1}' + f'/{game_id}.json'
-                    print(f'--Data will be saved at {path_to_file}')
-
-                    play_by_play, status_code = self.__download_play_by_play_for_game_id(game_id)
-                    if status_code == 200:
-                        self.__json_to_separate_file(play_by_play, path_to_file, override)
-                        season_dict = self.__json_to_single_file(play_by_play, game_id, season_dict, path_to_directory + f'/Season{year}{year+1}/season{year}{year+1}.json', override, False)
-                        was_last_round = False
-                    else:
-                        nb_of_miss += 1
-                    game_id += 1
-                if was_last_round:
+        Returns: A generator of (game_id, json (bytes), status code, validators)
+        """
+        game_ids = iter(game_ids)
+        pending = deque()
+        try:
+            for game_id in game_ids:
+                pending.append((game_id, executor.submit(self.__sync_play_by_play_for_game_id, season, game_id)))
+                if len(pending) >= self.max_workers:
                     break
-                if nb_of_miss == best_of_in_playoff:
-                    game_id = game_id + 100 - nb_of_matchup*10 - best_of_in_playoff #reset game_id for next round
-                    was_last_round = True #tell that the last check didnt yield any information
-                    nb_of_matchup = 0
-                else:
-                    game_id = game_id + 10 - best_of_in_playoff #reset game_id for next matchup
-                    nb_of_matchup += 1
-                
-            self.__json_to_single_file('', '', season_dict, path_to_directory + f'/Season{year}{year+1}/season{year}{year+1}.json', override, True)
-        
-        except Exception as error:
+            while pending:
+                game_id, future = pending.popleft()
+                next_game_id = next(game_ids, None)
+                if next_game_id is not None:
+                    pending.append((next_game_id, executor.submit(self.__sync_play_by_play_for_game_id, season, next_game_id)))
+                play_by_play, status_code, validators = future.result()
+                yield game_id, play_by_play, status_code, validators
+        finally:
+            for game_id, future in pending:
+                future.cancel()
+
+
+    def __sync_play_by_play_for_game_id(self, season: dict, game_id: int) -> [bytes, int, dict]:
+        """
+        Download a game unless the manifest says that the saved file is already up to date. In incremental mode a final game that is already saved
+        is not requested at all and a game that is not final yet is requested with the ETag/Last-Modified of the last download, the api answers
+        with a 304 if it didn't change.
+
+        Args:
+            season: State of the season being downloaded (see __download_games_for_season)
+            game_id: The game id to be fetched
+
+        Returns: The json (bytes), the status code (304 if the saved game is up to date) and the validators of the response
+        """
+        entry = season['manifest'].get(str(game_id))
+        previous_season_file = season['previous_season_file']
+        is_saved = entry is not None and entry['status'] == 'ok' and (game_id in season['season_file']
+                                                                       or (previous_season_file is not None and game_id in previous_season_file))
+        if not season['incremental'] or not is_saved:
+            return self.__download_play_by_play_for_game_id(game_id)
+        if entry.get('game_state') == 'Final':
+            return b'', 304, {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return self.__download_play_by_play_for_game_id(game_id, headers)
+
+
+    def __save_game(self, season: dict, game_id: int, play_by_play: bytes, status_code: int, validators: dict) -> str:
+        """
+        Save the result of the download of a game in the season file and the manifest. The manifest is written to disk
+        every few games so an interrupted download can be resumed with incremental=True.
+
+        Args:
+            season: State of the season being downloaded (see __download_games_for_season)
+            game_id: The game id that was fetched
+            play_by_play: json (bytes) returned by the api, parsed only once
+            status_code: Status code returned by the api, 304 if the saved game is up to date and None if the api could not be reached
+            validators: ETag and Last-Modified of the response
+
+        Returns: 'hit' if the game exists, 'miss' if it doesn't and 'failed' if the api could not tell
+        """
+        manifest = season['manifest']
+        entry = manifest.get(str(game_id), {})
+
+        season_file = season['season_file']
+        previous_season_file = season['previous_season_file']
+
+        if status_code == 304:
+            #The saved game is up to date, it is copied from the last season file unless it was recovered from an interrupted download
+            if game_id not in season_file:
+                season_file.copy_game(previous_season_file, game_id)
+            return 'hit'
+
+        if status_code == 200:
+            game = JsonBackend.loads(play_by_play)
+            #In incremental mode a game is only downloaded again when it changed, the saved game is replaced
+            override = season['override'] or season['incremental']
+            if not override and previous_season_file is not None and game_id in previous_season_file:
+                print(f'--Game {game_id} exist and we are not overriding')
+                season_file.copy_game(previous_season_file, game_id)
+            else:
+                print(f'--Game {game_id} will be saved in {season_file.path_to_file}')
+                season_file.add_game(game_id, play_by_play, self.__build_game_metadata(game))
+                season['season_changed'] = True
+            entry = {
+                'status': 'ok',
+                'status_code': status_code,
+                'etag': validators.get('etag'),
+                'last_modified': validators.get('last_modified'),
+                'sha256': hashlib.sha256(play_by_play).hexdigest(),
+                'game_state': game.get('gameData', {}).get('status', {}).get('abstractGameState'),
+                'fetched_at': datetime.now(timezone.utc).isoformat(),
+            }
+            outcome = 'hit'
+        elif self.__is_missing_game(status_code):
+            entry = {'status': 'missing', 'status_code': status_code, 'fetched_at': datetime.now(timezone.utc).isoformat()}
+            outcome = 'miss'
+        else:
+            season['failed_game_ids'].append(game_id)
+            #Keep what was saved before, a game that was never saved is flagged so it is requested again next time
+            entry = dict(entry)
+            if entry.get('status') != 'ok':
+                entry['status'] = 'failed'
+            entry['last_error'] = status_code
+            outcome = 'failed'
+
+        manifest[str(game_id)] = entry
+        season['nb_of_changes'] += 1
+        if season['nb_of_changes'] % 25 == 0:
+            self.__save_manifest(season['path_to_manifest'], manifest)
+        return outcome
+
+
+    def __build_game_metadata(self, game: dict) -> dict:
+        """
+        Information about a game kept in the index of the season file, so the games of a team can be found without reading every game.
+        """
+        teams = game.get('gameData', {}).get('teams', {})
+        return {'home': teams.get('home', {}).get('id'), 'away': teams.get('away', {}).get('id')}
+
+
+    def __close_season_file(self, season: dict):
+        """
+        Complete the season file with the games of the last season file that were not downloaded again and replace it. If no game changed,
+        the last season file is kept as is.
+
+        Args:
+            season: State of the season being downloaded (see __download_games_for_season)
+        """
+        season_file = season['season_file']
+        previous_season_file = season['previous_season_file']
+        if previous_season_file is None:
+            season_file.close()
+            return
+
+        for game_id in previous_season_file.game_ids():
+            if game_id not in season_file:
+                season_file.copy_game(previous_season_file, game_id)
+        previous_season_file.close()
+        if season['season_changed']:
+            season_file.close()
+        else:
+            print('No game changed, the season file is kept')
+            season_file.discard()
+
+
+    def __load_manifest(self, path_to_manifest: str) -> dict:
+        """
+        Load the manifest of a season, the manifest is a dictionary where the key is the game id and the value the information about its last download.
+
+        Args:
+            path_to_manifest: Path of the manifest file
+
+        Returns: The manifest, empty if the file doesn't exist or can't be read
+        """
+        if not path.exists(path_to_manifest):
+            return {}
+        try:
+            file = open(path_to_manifest, 'rb')
+            manifest = JsonBackend.loads(file.read())
+            file.close()
+            return manifest
+        except (OSError, ValueError) as error:
+            print(f'The manifest {path_to_manifest} could not be read, every game will be downloaded again')
             print(error)
-            
+            return {}
+
+
+    def __save_manifest(self, path_to_manifest: str, manifest: dict):
+        """
+        Write the manifest in a temporary file which then replaces the manifest, so a crash never leaves a partially written manifest.
+
+        Args:
+            path_to_manifest: Path of the manifest file
+            manifest: The manifest to save
+        """
+        path_to_temporary_file = path_to_manifest + '.tmp'
+        file = open(path_to_temporary_file, 'wb')
+        file.write(JsonBackend.dumps(manifest, indent=True, sort_keys=True))
+        file.close()
+        os.replace(path_to_temporary_file, path_to_manifest)
+
 
     def __build_game_id(self, year: int, for_regular_season: bool) -> int:
         """
@@ -192,6 +506,21 @@ class StatsApiProxy:
             return int((f'{year}{playoffsSeason}{playoffsFirstGame}'))
 
 
+    def __build_playoff_game_id(self, year: int, playoff_round: int, matchup: int, game: int) -> int:
+        """
+            Build the game id of a playoff game, for example 2017030415 is the fifth game of the first matchup of the fourth round
+
+            year : Year of the season
+            playoff_round : Round of the playoffs (1 to 4)
+            matchup : Matchup of the round
+            game : Game of the matchup (1 to 7)
+
+            returns the gameid of the playoff game.
+        """
+
+        return int(f'{year}030{playoff_round}{matchup}{game}')
+
+
     def __check_for_directory_existence(self, path_to_directory):
         """
         Check to see if the structure of directory to which we wish to save the file exist. If they do not exist, they will be created. If an error is rise,
@@ -216,97 +545,69 @@ class StatsApiProxy:
             exit(0)
 
 
-    def __json_to_separate_file(self, json: str, path_to_file: str, override: bool) -> bool:
+    def __is_missing_game(self, status_code: int) -> bool:
         """
+        A game is missing when the api answered with an error that is not a transport failure, a 429 or a 5xx (the api returns a 404 for a game
+        that doesn't exist). Only missing games count toward the end of season detection.
 
-        Create a file at the location mention and write the json inside of it. The method will allow override of file if allowed.
         Args:
-            json: json string of the data to be saved in a file
-            path_to_file: path where the file will be created
-            override: True to replace file if it exist, False to not override the file if it exist
+            status_code: Status code returned by __download_play_by_play_for_game_id, None if the api could not be reached
 
-        Returns: False if there was an error or if the file already exist and we do not wish to override. True otherwise
+        Returns: True if the game doesn't exist
         """
-
-        try:
-            if path.exists(path_to_file) and not override:
-                print('file exist and we are not overriding')
-                return True
-            if path.exists(path_to_file) and override:
-                print(f'file exist but will be replace with current {path_to_file}')
-            file = open(path_to_file, 'w', encoding='utf-8')
-            file.write(json)
-            file.close()
-            return True
-        except OSError as error:
-            print(error)
-            exit(0)
+        return status_code is not None and status_code != 200 and status_code not in RETRY_STATUS_CODES
 
 
-    def __json_to_single_file(self, json_game: str, game_id: int, season_dict: dict, path_to_file, override: bool, save_file: bool):
+    def __get_backoff_delay(self, attempt: int, response) -> float:
         """
+        Exponential backoff with full jitter, the Retry-After header of the response is used instead when the api sends one.
 
-        Append the json string to a singular file to create a single file that contains all the game of a singular season. This
-        is done to avoid opening multiple time files making the process slower down the line. The initial step of dowloading all the
-        game might be slower but once the data is dowloaded, it will be easier to simply open a singular file and associate the content to
-        a dictionary rather than opening and closing multiple file to construct a dictonary with all the data.
+        Args:
+            attempt: Number of the attempt that failed (starting at 0)
+            response: Response of the failed attempt, None if there was a transport error
 
-        json : a string in the form of a json to be added to the file
-        game_id : Game id of the game we wish to add to the dictionary
-        season_dict : Dictionary that holds all the games for a season
-        path_to_file : string to indicate where to find or create the file
-        override : True to replace the file if it exist, False to not replace the file and instead append to it.
-        save_file : True to save the file at the specify location, False means we are still addind data to the structure before saving it the file
+        Returns: The time in seconds to wait before the next attempt
         """
-
-        if save_file:
-            if path.exists(path_to_file):
-                if override:
-                    file = open(path_to_file, 'w', encoding='utf-8')
-                    file.write(json.dumps(season_dict))
-                    file.close()
-                    return
-            else:
-                file = open(path_to_file, 'w', encoding='utf-8')
-                file.write(json.dumps(season_dict))
-                file.close()
-                return
-        else:
-            if season_dict == None:
-                if path.exists(path_to_file):
-                    file = open(path_to_file, 'r', encoding='utf-8')
-                    jsonStr = file.read()
-                    season_dict = json.loads(jsonStr)
-                    file.close()
-                else:
-                    season_dict = {}
-            if not game_id in season_dict: #if the key isnt inside the dict we add the json to it
-                season_dict[game_id] = json.loads(json_game)
-            elif override:
-                season_dict[game_id] = json.loads(json_game)
-            return season_dict
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
 
 
-    def __download_play_by_play_for_game_id(self, game_id: int) -> [str,int]:
+    def __download_play_by_play_for_game_id(self, game_id: int, headers: dict = None) -> [bytes, int, dict]:
         """
 
         The method will fetch a html page at the follwing url https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live/ which contains
-        all the information about a hockey game in the format of a json structure. If the call to the api doesn't return a 200, the method will return an empty string
-        with the code 404
+        all the information about a hockey game in the format of a json structure. The request goes through the shared session and is retried
+        with an exponential backoff after a transport error, a 429 or a 5xx. If the call to the api doesn't return a 200, the method will return
+        an empty json with the status code of the last attempt, or None if the api could never be reached.
 
         Args:
             game_id: The game id to be fetched
+            headers: Headers added to the request, used for the conditional requests (If-None-Match, If-Modified-Since)
 
-        Returns: A json string which contains information about a specific Hockey game base on the game id
+        Returns: The json (bytes, as received, never decoded to str) which contains information about a specific Hockey game base on the game id, the status code and
+            the validators (etag, last_modified) of the response
 
         """
-        try:
-            json_play_by_play = requests.get(f'https://statsapi.web.nhl.com/api/v1/game/{game_id}/feed/live/')
-            print(f"The request for game_id {game_id} returned a {json_play_by_play.status_code}")
-            if json_play_by_play.status_code != 200:
-                print(f'dowload for game_id : {game_id} failed, return code was {json_play_by_play.status_code}')
-            return json_play_by_play.text, json_play_by_play.status_code
-        except Exception as error:
-            print(f'Error for game_id {game_id}')
-            print(error)
-            return '', 404
+        url = f'{self.base_url}/game/{game_id}/feed/live/'
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                print(f"The request for game_id {game_id} returned a {response.status_code}")
+                if response.status_code not in RETRY_STATUS_CODES:
+                    validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+                    if response.status_code == 304:
+                        return b'', response.status_code, validators
+                    if response.status_code != 200:
+                        print(f'dowload for game_id : {game_id} failed, return code was {response.status_code}')
+                        return b'', response.status_code, {}
+                    return response.content, response.status_code, validators
+            except requests.RequestException as error:
+                print(f'Error for game_id {game_id}')
+                print(error)
+            if attempt < self.max_retries:
+                time.sleep(self.__get_backoff_delay(attempt, response))
+
+        print(f'dowload for game_id : {game_id} failed after {self.max_retries + 1} attempts')
+        return b'', response.status_code if response is not None else None, {}
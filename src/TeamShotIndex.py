@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+#names of the columns of the dataframes of DataExtractor, and the names they had after the renaming done by the first versions of
+#get_team_shots_from_dataframe (the notebooks still rename them)
+TEAM_ID_COLUMNS = ['team.id', 'teamID']
+X_COLUMNS = ['coordinates.x', 'coordinatesX']
+Y_COLUMNS = ['coordinates.y', 'coordinatesY']
+
+
+def find_column(df: pd.DataFrame, names: list) -> str:
+    for name in names:
+        if name in df.columns:
+            return name
+    raise KeyError(f'The dataframe has none of the columns {names}')
+
+
+class TeamShotIndex:
+    def __init__(self, df: pd.DataFrame):
+        """
+        Index of the shots of a dataframe of plays (see DataExtractor.get_season_into_dataframe) by team. The coordinates of the shots are sorted
+        by team once, the shots of a team are then a slice of these arrays, so getting the shots of every team of the league only reads the
+        dataframe once. The dataframe is not modified.
+
+        Args:
+            df: The plays, with the columns team.id, coordinates.x, coordinates.y and gamePk
+        """
+        team_ids = df[find_column(df, TEAM_ID_COLUMNS)].to_numpy()
+        x = df[find_column(df, X_COLUMNS)].to_numpy(dtype=float)
+        y = df[find_column(df, Y_COLUMNS)].to_numpy(dtype=float)
+
+        #the plays without a team (or without coordinates) are not shots of any team
+        has_team = ~pd.isna(team_ids)
+        team_ids = team_ids[has_team].astype('int64')
+        game_pks = df['gamePk'].to_numpy()[has_team]
+        x, y = x[has_team], y[has_team]
+        self.nb_of_games = pd.Series(game_pks).groupby(team_ids).nunique().to_dict()
+
+        has_coordinates = ~(np.isnan(x) | np.isnan(y))
+        team_ids = team_ids[has_coordinates]
+        order = np.argsort(team_ids, kind='stable')
+        self.team_ids = team_ids[order]
+        self.x = x[has_coordinates][order]
+        self.y = y[has_coordinates][order]
+        self.game_pks = game_pks[has_coordinates][order]
+
+        unique_team_ids, starts = np.unique(self.team_ids, return_index=True)
+        ends = np.append(starts[1:], len(self.team_ids))
+        self.offsets = {int(team_id): (int(start), int(end)) for team_id, start, end in zip(unique_team_ids, starts, ends)}
+
+
+    def __contains__(self, team_id) -> bool:
+        return int(team_id) in self.offsets
+
+
+    def get_team_ids(self) -> list:
+        return sorted(set(self.offsets) | set(self.nb_of_games))
+
+
+    def get_team_shots(self, team_id: int) -> (np.ndarray, np.ndarray):
+        """
+        Args:
+            team_id: Id of the team
+
+        Returns: The x and y coordinates of the shots of the team, in the order of the dataframe. They are views of the index, not copies,
+            they must not be modified.
+        """
+        start, end = self.offsets.get(int(team_id), (0, 0))
+        return self.x[start:end], self.y[start:end]
+
+
+    def get_team_game_pks(self, team_id: int) -> np.ndarray:
+        start, end = self.offsets.get(int(team_id), (0, 0))
+        return self.game_pks[start:end]
+
+
+    def get_nb_of_games(self, team_id: int) -> int:
+        """
+        Returns: The number of games where the team has at least one play in the dataframe
+        """
+        return int(self.nb_of_games.get(int(team_id), 0))
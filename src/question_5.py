@@ -8,8 +8,8 @@ from src.DataExtractor import DataExtractor
 
 data_extractor = DataExtractor()
 
-#data = data_extractor.get_game_data('./../ift6758/data/hockey/test/Season20172018/season20172018.json')
-#df = data_extractor.get_season_into_dataframe('./../ift6758/data/hockey/test/Season20172018/season20172018.json')
+#data = data_extractor.get_game_data('./../ift6758/data/hockey/test/Season20172018/season20172018.games')
+#df = data_extractor.get_season_into_dataframe('./../ift6758/data/hockey/test/Season20172018/season20172018.games')
 data = data_extractor.get_game_data('./../ift6758/data/hockey/test/Season20172018/Playoff20172018/2017030115.json')
 data = data_extractor.clean_json(data)
 pd_data = data_extractor.create_panda_dataframe(data)